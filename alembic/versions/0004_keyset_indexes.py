@@ -0,0 +1,28 @@
+from alembic import op
+
+revision = "0004_keyset_indexes"
+down_revision = "0003_indexes_and_pg_trgm"
+branch_labels = None
+depends_on = None
+
+# (table, sort column) pairs used by keyset pagination: ORDER BY <col>, id
+KEYSET_INDEXES = [
+    ("orders", "cost"),
+    ("orders", "issue_date"),
+    ("orders", "planned_end_date"),
+    ("orders", "actual_end_date"),
+    ("orders", "work_type"),
+    ("orders", "status"),
+    ("cars", "brand"),
+    ("cars", "year"),
+    ("mechanics", "experience_years"),
+    ("mechanics", "grade"),
+]
+
+def upgrade():
+    for table, col in KEYSET_INDEXES:
+        op.create_index(f"ix_{table}_{col}_id", table, [col, "id"])
+
+def downgrade():
+    for table, col in reversed(KEYSET_INDEXES):
+        op.drop_index(f"ix_{table}_{col}_id", table_name=table)
@@ -0,0 +1,95 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005_mechanic_daily_revenue"
+down_revision = "0004_keyset_indexes"
+branch_labels = None
+depends_on = None
+
+# Statement-level triggers with transition tables: a multi-row INSERT/UPDATE/DELETE
+# touches each (mechanic_id, day) bucket once instead of once per order.
+ROLLUP_FUNCTIONS = """
+CREATE OR REPLACE FUNCTION orders_rollup_insert() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO mechanic_daily_revenue AS r (mechanic_id, day, revenue, orders_count)
+    SELECT mechanic_id, issue_date, sum(cost), count(*)
+    FROM new_rows
+    GROUP BY mechanic_id, issue_date
+    ORDER BY mechanic_id, issue_date
+    ON CONFLICT (mechanic_id, day) DO UPDATE
+        SET revenue = r.revenue + EXCLUDED.revenue,
+            orders_count = r.orders_count + EXCLUDED.orders_count;
+    RETURN NULL;
+END $$;
+
+CREATE OR REPLACE FUNCTION orders_rollup_delete() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE mechanic_daily_revenue r
+    SET revenue = r.revenue - d.revenue,
+        orders_count = r.orders_count - d.orders_count
+    FROM (
+        SELECT mechanic_id, issue_date AS day, sum(cost) AS revenue, count(*) AS orders_count
+        FROM old_rows
+        GROUP BY mechanic_id, issue_date
+    ) d
+    WHERE r.mechanic_id = d.mechanic_id AND r.day = d.day;
+    RETURN NULL;
+END $$;
+
+CREATE OR REPLACE FUNCTION orders_rollup_update() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO mechanic_daily_revenue AS r (mechanic_id, day, revenue, orders_count)
+    SELECT mechanic_id, day, sum(revenue), sum(orders_count)
+    FROM (
+        SELECT mechanic_id, issue_date AS day, cost AS revenue, 1 AS orders_count FROM new_rows
+        UNION ALL
+        SELECT mechanic_id, issue_date, -cost, -1 FROM old_rows
+    ) delta
+    GROUP BY mechanic_id, day
+    HAVING sum(revenue) <> 0 OR sum(orders_count) <> 0
+    ORDER BY mechanic_id, day
+    ON CONFLICT (mechanic_id, day) DO UPDATE
+        SET revenue = r.revenue + EXCLUDED.revenue,
+            orders_count = r.orders_count + EXCLUDED.orders_count;
+    RETURN NULL;
+END $$;
+"""
+
+TRIGGERS = """
+CREATE TRIGGER orders_rollup_insert AFTER INSERT ON orders
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION orders_rollup_insert();
+CREATE TRIGGER orders_rollup_update AFTER UPDATE ON orders
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION orders_rollup_update();
+CREATE TRIGGER orders_rollup_delete AFTER DELETE ON orders
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION orders_rollup_delete();
+"""
+
+def upgrade():
+    op.create_table(
+        "mechanic_daily_revenue",
+        sa.Column("mechanic_id", sa.Integer(), sa.ForeignKey("mechanics.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("revenue", sa.Numeric(14, 2), server_default="0", nullable=False),
+        sa.Column("orders_count", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.create_index("ix_mechanic_daily_revenue_day", "mechanic_daily_revenue", ["day"])
+
+    op.execute(ROLLUP_FUNCTIONS)
+    op.execute(TRIGGERS)
+
+    op.execute(
+        "INSERT INTO mechanic_daily_revenue (mechanic_id, day, revenue, orders_count) "
+        "SELECT mechanic_id, issue_date, sum(cost), count(*) FROM orders GROUP BY mechanic_id, issue_date"
+    )
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS orders_rollup_delete ON orders;")
+    op.execute("DROP TRIGGER IF EXISTS orders_rollup_update ON orders;")
+    op.execute("DROP TRIGGER IF EXISTS orders_rollup_insert ON orders;")
+    op.execute("DROP FUNCTION IF EXISTS orders_rollup_delete();")
+    op.execute("DROP FUNCTION IF EXISTS orders_rollup_update();")
+    op.execute("DROP FUNCTION IF EXISTS orders_rollup_insert();")
+    op.drop_table("mechanic_daily_revenue")
@@ -0,0 +1,54 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006_index_rationalization"
+down_revision = "0005_mechanic_daily_revenue"
+branch_labels = None
+depends_on = None
+
+# (name, table, columns) of 0001/0002 single-column indexes. Most are prefixes of the
+# (<col>, id) keyset indexes from 0004; owner_name and full_name are never filtered on;
+# car_id / mechanic_id are replaced by the composites below.
+UNUSED_INDEXES = [
+    ("ix_orders_car_id", "orders", ["car_id"]),
+    ("ix_orders_mechanic_id", "orders", ["mechanic_id"]),
+    ("ix_orders_cost", "orders", ["cost"]),
+    ("ix_orders_issue_date", "orders", ["issue_date"]),
+    ("ix_orders_work_type", "orders", ["work_type"]),
+    ("ix_orders_planned_end_date", "orders", ["planned_end_date"]),
+    ("ix_orders_actual_end_date", "orders", ["actual_end_date"]),
+    ("ix_orders_status", "orders", ["status"]),
+    ("ix_cars_brand", "cars", ["brand"]),
+    ("ix_cars_year", "cars", ["year"]),
+    ("ix_cars_owner_name", "cars", ["owner_name"]),
+    ("ix_mechanics_full_name", "mechanics", ["full_name"]),
+    ("ix_mechanics_experience_years", "mechanics", ["experience_years"]),
+    ("ix_mechanics_grade", "mechanics", ["grade"]),
+]
+
+def upgrade():
+    # filter_orders joined by brand / grade with an issue_date range, FK cascades,
+    # and the rollup backfill (GROUP BY mechanic_id, issue_date) as an index-only scan
+    op.create_index("ix_orders_car_id_issue_date", "orders", ["car_id", "issue_date"], postgresql_include=["cost"])
+    op.create_index("ix_orders_mechanic_id_issue_date", "orders", ["mechanic_id", "issue_date"], postgresql_include=["cost"])
+    # keyset index for issue_date, widened so revenue range aggregates are index-only too
+    op.drop_index("ix_orders_issue_date_id", table_name="orders")
+    op.create_index("ix_orders_issue_date_id", "orders", ["issue_date", "id"], postgresql_include=["mechanic_id", "cost"])
+    # close-overdue only touches the (small) overdue subset
+    op.create_index(
+        "ix_orders_overdue", "orders", ["id"],
+        postgresql_where=sa.text("actual_end_date > planned_end_date"),
+    )
+
+    for name, table, _ in UNUSED_INDEXES:
+        op.drop_index(name, table_name=table)
+
+def downgrade():
+    for name, table, cols in reversed(UNUSED_INDEXES):
+        op.create_index(name, table, cols)
+
+    op.drop_index("ix_orders_overdue", table_name="orders")
+    op.drop_index("ix_orders_issue_date_id", table_name="orders")
+    op.create_index("ix_orders_issue_date_id", "orders", ["issue_date", "id"])
+    op.drop_index("ix_orders_mechanic_id_issue_date", table_name="orders")
+    op.drop_index("ix_orders_car_id_issue_date", table_name="orders")
@@ -0,0 +1,105 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007_partition_orders"
+down_revision = "0006_index_rationalization"
+branch_labels = None
+depends_on = None
+
+# Monthly partitions orders_yYYYYmMM from the month of from_day up to months_ahead months
+# past the current one. A partition is built as a standalone table and then attached, so
+# rows that already landed in orders_default for that month are moved into it first.
+ENSURE_PARTITIONS = """
+CREATE OR REPLACE FUNCTION orders_ensure_partitions(from_day date DEFAULT current_date, months_ahead int DEFAULT 3)
+RETURNS int LANGUAGE plpgsql AS $$
+DECLARE
+    m date := date_trunc('month', from_day)::date;
+    last_month date := (date_trunc('month', current_date) + make_interval(months => months_ahead))::date;
+    next_month date;
+    part text;
+    created int := 0;
+BEGIN
+    WHILE m <= last_month LOOP
+        next_month := (m + interval '1 month')::date;
+        part := 'orders_' || to_char(m, '"y"YYYY"m"MM');
+        IF to_regclass(part) IS NULL THEN
+            EXECUTE format('CREATE TABLE %I (LIKE orders INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', part);
+            EXECUTE format(
+                'WITH moved AS (DELETE FROM orders_default WHERE issue_date >= %L AND issue_date < %L RETURNING *) '
+                'INSERT INTO %I SELECT * FROM moved', m, next_month, part);
+            EXECUTE format('ALTER TABLE orders ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)', part, m, next_month);
+            created := created + 1;
+        END IF;
+        m := next_month;
+    END LOOP;
+    RETURN created;
+END $$;
+"""
+
+# same triggers as 0005; they are dropped together with the old heap
+TRIGGERS = """
+CREATE TRIGGER orders_rollup_insert AFTER INSERT ON orders
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION orders_rollup_insert();
+CREATE TRIGGER orders_rollup_update AFTER UPDATE ON orders
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION orders_rollup_update();
+CREATE TRIGGER orders_rollup_delete AFTER DELETE ON orders
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION orders_rollup_delete();
+"""
+
+FOREIGN_KEYS = """
+ALTER TABLE orders ADD CONSTRAINT orders_car_id_fkey
+    FOREIGN KEY (car_id) REFERENCES cars (id) ON DELETE CASCADE;
+ALTER TABLE orders ADD CONSTRAINT orders_mechanic_id_fkey
+    FOREIGN KEY (mechanic_id) REFERENCES mechanics (id) ON DELETE CASCADE;
+"""
+
+def _index_defs(table):
+    # every secondary index (keyset, covering, partial, trigram, ...) carries over as is
+    rows = op.get_bind().execute(sa.text(
+        "SELECT indexdef FROM pg_indexes "
+        "WHERE schemaname = current_schema() AND tablename = :table AND indexname <> 'orders_pkey'"
+    ), {"table": table}).scalars().all()
+    return [d.replace(" ON ONLY ", " ON ").replace(f".{table} USING", ".orders USING") for d in rows]
+
+def upgrade():
+    op.execute("ALTER TABLE orders RENAME TO orders_old")
+    indexes = _index_defs("orders_old")
+
+    op.execute(
+        "CREATE TABLE orders (LIKE orders_old INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+        "PARTITION BY RANGE (issue_date)"
+    )
+    op.execute("ALTER SEQUENCE orders_id_seq OWNED BY orders.id")
+    op.execute("CREATE TABLE orders_default PARTITION OF orders DEFAULT")
+    op.execute(ENSURE_PARTITIONS)
+    op.execute("SELECT orders_ensure_partitions(coalesce((SELECT min(issue_date) FROM orders_old), current_date))")
+    op.execute("INSERT INTO orders SELECT * FROM orders_old")
+    op.execute("DROP TABLE orders_old")
+
+    # the partition key has to be part of every unique constraint; ids still come from one sequence
+    op.execute("ALTER TABLE orders ADD CONSTRAINT orders_pkey PRIMARY KEY (id, issue_date)")
+    op.execute(FOREIGN_KEYS)
+    for ddl in indexes:
+        op.execute(ddl)
+    op.execute(TRIGGERS)
+    op.execute("ANALYZE orders")
+
+def downgrade():
+    op.execute("ALTER TABLE orders RENAME TO orders_old")
+    indexes = _index_defs("orders_old")
+
+    op.execute("CREATE TABLE orders (LIKE orders_old INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+    op.execute("ALTER SEQUENCE orders_id_seq OWNED BY orders.id")
+    op.execute("INSERT INTO orders SELECT * FROM orders_old")
+    op.execute("DROP TABLE orders_old")
+    op.execute("DROP FUNCTION IF EXISTS orders_ensure_partitions(date, int)")
+
+    op.execute("ALTER TABLE orders ADD CONSTRAINT orders_pkey PRIMARY KEY (id)")
+    op.execute(FOREIGN_KEYS)
+    for ddl in indexes:
+        op.execute(ddl)
+    op.execute(TRIGGERS)
+    op.execute("ANALYZE orders")
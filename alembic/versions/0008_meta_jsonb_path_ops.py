@@ -0,0 +1,17 @@
+from alembic import op
+
+revision = "0008_meta_jsonb_path_ops"
+down_revision = "0007_partition_orders"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # serves meta @> '{...}' and meta @? '$...' (structured search-meta modes);
+    # jsonb_path_ops is smaller than the default jsonb_ops and only supports those operators
+    op.create_index(
+        "ix_orders_meta_path_ops", "orders", ["meta"],
+        postgresql_using="gin", postgresql_ops={"meta": "jsonb_path_ops"},
+    )
+
+def downgrade():
+    op.drop_index("ix_orders_meta_path_ops", table_name="orders")
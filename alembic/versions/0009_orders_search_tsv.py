@@ -0,0 +1,59 @@
+from alembic import op
+
+revision = "0009_orders_search_tsv"
+down_revision = "0008_meta_jsonb_path_ops"
+branch_labels = None
+depends_on = None
+
+# work type and symptoms weigh more than the free-form comment. Both configurations are
+# indexed: russian stems Cyrillic words, english stems Latin ones ("noise" ~ "noises").
+SEARCH_TSV = """
+setweight(to_tsvector('russian', coalesce(work_type, '') || ' ' || coalesce(meta->>'symptoms', '')), 'A') ||
+setweight(to_tsvector('russian', coalesce(meta->>'comment', '')), 'B') ||
+setweight(to_tsvector('english', coalesce(work_type, '') || ' ' || coalesce(meta->>'symptoms', '')), 'A') ||
+setweight(to_tsvector('english', coalesce(meta->>'comment', '')), 'B')
+"""
+
+# 0007's version with LIKE ... INCLUDING GENERATED (a partition's generated columns must
+# match the parent's) and an explicit column list, since generated columns cannot be inserted
+ENSURE_PARTITIONS = """
+CREATE OR REPLACE FUNCTION orders_ensure_partitions(from_day date DEFAULT current_date, months_ahead int DEFAULT 3)
+RETURNS int LANGUAGE plpgsql AS $$
+DECLARE
+    m date := date_trunc('month', from_day)::date;
+    last_month date := (date_trunc('month', current_date) + make_interval(months => months_ahead))::date;
+    next_month date;
+    part text;
+    cols text;
+    created int := 0;
+BEGIN
+    SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum) INTO cols
+    FROM pg_attribute
+    WHERE attrelid = 'orders'::regclass AND attnum > 0 AND NOT attisdropped AND attgenerated = '';
+
+    WHILE m <= last_month LOOP
+        next_month := (m + interval '1 month')::date;
+        part := 'orders_' || to_char(m, '"y"YYYY"m"MM');
+        IF to_regclass(part) IS NULL THEN
+            EXECUTE format('CREATE TABLE %I (LIKE orders INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING GENERATED)', part);
+            EXECUTE format(
+                'WITH moved AS (DELETE FROM orders_default WHERE issue_date >= %L AND issue_date < %L RETURNING *) '
+                'INSERT INTO %I (%s) SELECT %s FROM moved', m, next_month, part, cols, cols);
+            EXECUTE format('ALTER TABLE orders ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)', part, m, next_month);
+            created := created + 1;
+        END IF;
+        m := next_month;
+    END LOOP;
+    RETURN created;
+END $$;
+"""
+
+def upgrade():
+    op.execute(f"ALTER TABLE orders ADD COLUMN search_tsv tsvector GENERATED ALWAYS AS ({SEARCH_TSV}) STORED")
+    op.execute("CREATE INDEX ix_orders_search_tsv ON orders USING GIN (search_tsv)")
+    op.execute(ENSURE_PARTITIONS)
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_orders_search_tsv")
+    op.execute("ALTER TABLE orders DROP COLUMN search_tsv")
+    # orders_ensure_partitions keeps the 0009 body, which also works without generated columns
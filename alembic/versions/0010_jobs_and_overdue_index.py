@@ -0,0 +1,46 @@
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+revision = "0010_jobs_and_overdue_index"
+down_revision = "0009_orders_search_tsv"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("kind", sa.String(length=64), nullable=False),
+        sa.Column("status", sa.String(length=16), server_default="queued", nullable=False),
+        sa.Column("params", JSONB(), server_default="{}", nullable=False),
+        sa.Column("total", sa.Integer(), nullable=True),
+        sa.Column("processed", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("batches", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    # at most one queued/running job per kind; a second enqueue returns the active one
+    op.create_index(
+        "ux_jobs_active_kind", "jobs", ["kind"], unique=True,
+        postgresql_where=sa.text("status IN ('queued', 'running')"),
+    )
+
+    # closed orders drop out of the overdue index, so it only holds the remaining work
+    op.drop_index("ix_orders_overdue", table_name="orders")
+    op.create_index(
+        "ix_orders_overdue", "orders", ["id"],
+        postgresql_where=sa.text("actual_end_date > planned_end_date AND status <> 'done'"),
+    )
+
+def downgrade():
+    op.drop_index("ix_orders_overdue", table_name="orders")
+    op.create_index(
+        "ix_orders_overdue", "orders", ["id"],
+        postgresql_where=sa.text("actual_end_date > planned_end_date"),
+    )
+    op.drop_index("ux_jobs_active_kind", table_name="jobs")
+    op.drop_table("jobs")
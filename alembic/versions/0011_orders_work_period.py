@@ -0,0 +1,57 @@
+from alembic import op
+
+revision = "0011_orders_work_period"
+down_revision = "0010_jobs_and_overdue_index"
+branch_labels = None
+depends_on = None
+
+# days a mechanic is busy with an order, both ends included; greatest() keeps the
+# range valid for orders whose recorded end precedes the issue date
+WORK_PERIOD = "daterange(issue_date, greatest(coalesce(actual_end_date, planned_end_date), issue_date), '[]')"
+
+# PostgreSQL 16 has no exclusion constraints on partitioned tables (later versions only
+# allow ones that compare the partition key with =), so the double-booking check is a
+# trigger that looks across partitions. It only runs where
+# autoservice.prevent_double_booking = on, e.g.
+#   ALTER DATABASE autoservice SET autoservice.prevent_double_booking = on;
+DOUBLE_BOOKING = """
+CREATE OR REPLACE FUNCTION orders_prevent_double_booking() RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+    period daterange;
+BEGIN
+    IF coalesce(current_setting('autoservice.prevent_double_booking', true), '') <> 'on' THEN
+        RETURN NEW;
+    END IF;
+    -- generated columns are not computed yet in a BEFORE trigger
+    period := daterange(NEW.issue_date, greatest(coalesce(NEW.actual_end_date, NEW.planned_end_date), NEW.issue_date), '[]');
+    IF TG_OP = 'UPDATE' AND NEW.mechanic_id = OLD.mechanic_id AND period <@ OLD.work_period THEN
+        RETURN NEW;
+    END IF;
+    -- bookings of one mechanic are serialized, so two transactions cannot both pass the check
+    PERFORM pg_advisory_xact_lock(hashtext('orders_booking'), NEW.mechanic_id);
+    IF EXISTS (
+        SELECT 1 FROM orders
+        WHERE mechanic_id = NEW.mechanic_id AND work_period && period AND id <> NEW.id
+    ) THEN
+        RAISE EXCEPTION 'mechanic % is already booked during %', NEW.mechanic_id, period
+            USING ERRCODE = 'exclusion_violation', CONSTRAINT = 'orders_no_double_booking';
+    END IF;
+    RETURN NEW;
+END $$;
+
+CREATE TRIGGER orders_no_double_booking BEFORE INSERT OR UPDATE ON orders
+    FOR EACH ROW EXECUTE FUNCTION orders_prevent_double_booking();
+"""
+
+def upgrade():
+    # integer equality in a GiST index
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.execute(f"ALTER TABLE orders ADD COLUMN work_period daterange GENERATED ALWAYS AS ({WORK_PERIOD}) STORED")
+    op.execute("CREATE INDEX ix_orders_mechanic_id_work_period ON orders USING GIST (mechanic_id, work_period)")
+    op.execute(DOUBLE_BOOKING)
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS orders_no_double_booking ON orders")
+    op.execute("DROP FUNCTION IF EXISTS orders_prevent_double_booking()")
+    op.execute("DROP INDEX IF EXISTS ix_orders_mechanic_id_work_period")
+    op.execute("ALTER TABLE orders DROP COLUMN work_period")
@@ -0,0 +1,65 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0012_orders_change_feed"
+down_revision = "0011_orders_work_period"
+branch_labels = None
+depends_on = None
+
+# writing transaction id (xid8 as bigint; it never wraps around)
+CURRENT_XID = "pg_current_xact_id()::text::bigint"
+
+# Inserts take both values from the column defaults; moving rows between partitions
+# (orders_ensure_partitions) copies them, so the rows are not reported as changed.
+CHANGE_FEED = f"""
+CREATE OR REPLACE FUNCTION orders_touch_updated_seq() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.updated_seq := nextval('orders_change_seq');
+    NEW.updated_xid := {CURRENT_XID};
+    RETURN NEW;
+END $$;
+
+-- statement level: an UPDATE that moves a row to another partition is not a delete here
+CREATE OR REPLACE FUNCTION orders_record_tombstones() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO order_tombstones (order_id) SELECT id FROM old_rows ORDER BY id;
+    RETURN NULL;
+END $$;
+
+CREATE TRIGGER orders_touch_updated_seq BEFORE UPDATE ON orders
+    FOR EACH ROW EXECUTE FUNCTION orders_touch_updated_seq();
+CREATE TRIGGER orders_record_tombstones AFTER DELETE ON orders
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION orders_record_tombstones();
+"""
+
+def upgrade():
+    op.execute("CREATE SEQUENCE orders_change_seq")
+    # one rewrite of every partition for both columns
+    op.execute(
+        "ALTER TABLE orders "
+        "ADD COLUMN updated_seq bigint NOT NULL DEFAULT nextval('orders_change_seq'), "
+        f"ADD COLUMN updated_xid bigint NOT NULL DEFAULT {CURRENT_XID}"
+    )
+    op.execute("ALTER SEQUENCE orders_change_seq OWNED BY orders.updated_seq")
+    op.create_index("ix_orders_updated_xid_updated_seq", "orders", ["updated_xid", "updated_seq"])
+
+    op.create_table(
+        "order_tombstones",
+        sa.Column("seq", sa.BigInteger(), server_default=sa.text("nextval('orders_change_seq')"), primary_key=True),
+        sa.Column("xid", sa.BigInteger(), server_default=sa.text(CURRENT_XID), nullable=False),
+        sa.Column("order_id", sa.Integer(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("ix_order_tombstones_xid_seq", "order_tombstones", ["xid", "seq"])
+    op.create_index("ix_order_tombstones_deleted_at", "order_tombstones", ["deleted_at"])
+    op.execute(CHANGE_FEED)
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS orders_record_tombstones ON orders")
+    op.execute("DROP TRIGGER IF EXISTS orders_touch_updated_seq ON orders")
+    op.execute("DROP FUNCTION IF EXISTS orders_record_tombstones()")
+    op.execute("DROP FUNCTION IF EXISTS orders_touch_updated_seq()")
+    op.drop_table("order_tombstones")
+    op.drop_index("ix_orders_updated_xid_updated_seq", table_name="orders")
+    op.execute("ALTER TABLE orders DROP COLUMN updated_xid, DROP COLUMN updated_seq")
@@ -0,0 +1,103 @@
+from collections import Counter
+from fastapi import HTTPException
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from .schemas import BulkItemResult, BulkResult
+from .writes import CONSTRAINT_ERRORS
+
+BULK_MAX_ITEMS = 5000
+
+def check_bulk_size(items):
+    if not items:
+        raise HTTPException(400, "Empty payload")
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(400, f"At most {BULK_MAX_ITEMS} items per request")
+
+async def unique_errors(db, model, field: str, items) -> dict[int, str]:
+    """Per-item errors for values of a unique column that repeat in the batch or already
+    belong to another row. Items may carry an `id` (updates) to allow keeping their own value."""
+    col = getattr(model, field)
+    values = {i: getattr(p, field) for i, p in enumerate(items) if getattr(p, field, None) is not None}
+    if not values:
+        return {}
+    taken = dict((await db.execute(select(col, model.id).where(col.in_(set(values.values()))))).all())
+    counts = Counter(values.values())
+
+    errors = {}
+    for i, v in values.items():
+        if counts[v] > 1:
+            errors[i] = f"duplicate {field} in payload: {v}"
+        elif v in taken and taken[v] != getattr(items[i], "id", None):
+            errors[i] = f"{field} already exists: {v}"
+    return errors
+
+async def existing_ids(db, model, ids) -> set[int]:
+    if not ids:
+        return set()
+    return set((await db.scalars(select(model.id).where(model.id.in_(set(ids))))).all())
+
+def build_result(n: int, errors: dict[int, str], ids: dict[int, int]) -> BulkResult:
+    items = [BulkItemResult(index=i, id=ids.get(i), error=errors.get(i)) for i in range(n)]
+    return BulkResult(succeeded=len(ids), failed=len(errors), items=items)
+
+async def _scalars_all(db, *args):
+    return (await db.scalars(*args)).all()
+
+async def _write(db, run):
+    """Await `run()` and commit. A constraint or trigger that fails in the statement itself
+    (e.g. a concurrent write after the checks above) or at commit rejects the whole batch."""
+    try:
+        result = await run()
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        detail = CONSTRAINT_ERRORS.get(getattr(e.orig.diag, "constraint_name", None)) or e.orig
+        raise HTTPException(400, f"Bulk write rejected, nothing was saved: {detail}")
+    return result
+
+async def bulk_insert(db, model, items, errors: dict[int, str], defaults: dict | None = None) -> BulkResult:
+    """Insert every item without an error using one multi-row INSERT ... RETURNING id."""
+    positions = [i for i in range(len(items)) if i not in errors]
+    rows = []
+    for i in positions:
+        data = items[i].model_dump()
+        for k, v in (defaults or {}).items():
+            if data.get(k) is None:
+                data[k] = v
+        rows.append(data)
+
+    ids = {}
+    if rows:
+        stmt = insert(model).returning(model.id, sort_by_parameter_order=True)
+        new_ids = await _write(db, lambda: _scalars_all(db, stmt, rows))
+        ids = dict(zip(positions, new_ids))
+    return build_result(len(items), errors, ids)
+
+async def bulk_update(db, model, items, errors: dict[int, str]) -> BulkResult:
+    """Apply partial updates by primary key in one transaction; unknown ids are reported per item."""
+    found = await existing_ids(db, model, [p.id for p in items])
+    for i, p in enumerate(items):
+        if p.id not in found:
+            errors.setdefault(i, f"id {p.id} not found")
+
+    positions = [i for i in range(len(items)) if i not in errors]
+    rows = [items[i].model_dump(exclude_unset=True) | {"id": items[i].id} for i in positions]
+    if rows:
+        # same lock order in every transaction, so concurrent bulk updates cannot deadlock
+        rows.sort(key=lambda r: r["id"])
+        await _write(db, lambda: db.execute(update(model), rows))
+    return build_result(len(items), errors, {i: items[i].id for i in positions})
+
+async def bulk_delete(db, model, ids: list[int]) -> BulkResult:
+    """Delete by primary key; only the first occurrence of an id counts, repeats are reported per item."""
+    check_bulk_size(ids)
+    first = {}
+    for i, x in enumerate(ids):
+        first.setdefault(x, i)
+    stmt = delete(model).where(model.id.in_(first.keys())).returning(model.id)
+    deleted = set(await _write(db, lambda: _scalars_all(db, stmt)))
+    errors = {
+        i: "duplicate id in request" if first[x] != i else f"id {x} not found"
+        for i, x in enumerate(ids) if first[x] != i or x not in deleted
+    }
+    return build_result(len(ids), errors, {i: x for i, x in enumerate(ids) if i not in errors})
@@ -0,0 +1,259 @@
+import asyncio
+import functools
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from datetime import date
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from .config import settings
+from .sync_mode import on_worker_thread, run_blocking
+
+CACHED_TABLES = ("orders", "cars", "mechanics")
+
+# deleting a car or mechanic cascades to its orders in the database
+CASCADES = {"cars": ("orders",), "mechanics": ("orders",)}
+
+class MemoryBackend:
+    """In-process LRU cache with per-entry TTL; versions live in the same process."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries: OrderedDict[str, tuple[float, object]] = OrderedDict()
+        self.versions: dict[str, int] = defaultdict(int)
+        self.evictions = 0
+        self.lock = threading.Lock()
+        # versions live in this process only: other workers never see its writes
+        self.shared = False
+        self.blocking = False
+
+    def get(self, key: str):
+        with self.lock:
+            item = self.entries.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value, ttl: int):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_versions(self, tables) -> list[int]:
+        with self.lock:
+            return [self.versions[t] for t in tables]
+
+    def bump(self, table: str):
+        with self.lock:
+            self.versions[table] += 1
+
+    def info(self) -> dict:
+        return {"backend": "memory", "entries": len(self.entries), "max_entries": self.max_entries, "evictions": self.evictions}
+
+class RedisBackend:
+    """Shared cache for multi-worker deployments. Eviction is left to Redis
+    (run it with maxmemory-policy allkeys-lru); entries expire after the TTL."""
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package") from e
+        self.client = redis.Redis.from_url(url)
+        self.shared = True
+        # network round trips: called through the threadpool, never on the event loop
+        self.blocking = True
+
+    def get(self, key: str):
+        raw = self.client.get("cache:" + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value, ttl: int):
+        self.client.set("cache:" + key, json.dumps(value), ex=ttl)
+
+    def get_versions(self, tables) -> list[int]:
+        return [int(v or 0) for v in self.client.mget([f"version:{t}" for t in tables])]
+
+    def bump(self, table: str):
+        self.client.incr(f"version:{table}")
+
+    def info(self) -> dict:
+        return {"backend": "redis"}
+
+def make_backend():
+    if settings.cache_backend == "redis":
+        return RedisBackend(settings.redis_url)
+    return MemoryBackend(settings.cache_max_entries)
+
+backend = make_backend()
+stats: dict[str, dict[str, int]] = defaultdict(lambda: {"hits": 0, "misses": 0})
+
+async def _call(fn, *args):
+    return await run_blocking(fn, *args) if backend.blocking else fn(*args)
+
+async def cache_get(key: str):
+    return await _call(backend.get, key)
+
+async def cache_set(key: str, value, ttl: int):
+    await _call(backend.set, key, value, ttl)
+
+async def table_versions(tables) -> dict[str, int]:
+    return dict(zip(tables, await _call(backend.get_versions, tables)))
+
+def bump(*tables: str):
+    for t in tables:
+        backend.bump(t)
+
+def _on_event_loop() -> bool:
+    # a sync-mode handler runs a loop of its own on a worker thread, where blocking is fine
+    if on_worker_thread.get():
+        return False
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+# --- write tracking: every committed ORM write bumps the version of its table(s)
+
+def _record(session, table: str, deleted: bool = False):
+    written = session.info.setdefault("written_tables", set())
+    written.add(table)
+    if deleted:
+        written.update(CASCADES.get(table, ()))
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_statement(state):
+    if state.is_insert or state.is_update or state.is_delete:
+        for mapper in state.all_mappers:
+            _record(state.session, mapper.local_table.name, deleted=state.is_delete)
+
+@event.listens_for(Session, "after_flush")
+def _track_flush(session, flush_context):
+    for obj in session.new | session.dirty:
+        _record(session, obj.__table__.name)
+    for obj in session.deleted:
+        _record(session, obj.__table__.name, deleted=True)
+
+@event.listens_for(Session, "after_commit")
+def _bump_written(session):
+    tables = session.info.pop("written_tables", ())
+    if backend.blocking and _on_event_loop():
+        # an AsyncSession commits on the event loop; VersionedAsyncSession.commit bumps
+        # these from the threadpool before it returns
+        session.info.setdefault("pending_bumps", set()).update(tables)
+    else:
+        bump(*sorted(tables))
+
+async def bump_pending(session):
+    """Bumps deferred by _bump_written for a commit made on the event loop."""
+    tables = session.info.pop("pending_bumps", ())
+    if tables:
+        await run_blocking(bump, *sorted(tables))
+
+@event.listens_for(Session, "after_rollback")
+def _forget_written(session):
+    session.info.pop("written_tables", None)
+
+# --- endpoint decorator
+
+SKIP_PARAMS = {"db", "response", "request", "if_none_match"}
+
+def _param_default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    return vars(value)
+
+# a replica serves what it has replayed so far, not what the version counters say
+REPLAY_LSN = text("SELECT pg_last_wal_replay_lsn()::text")
+
+async def replay_position(db) -> str:
+    """Replay LSN of a replica session, "" on the primary; read once per session so the
+    cache key and the ETag of a request agree."""
+    if not db.info.get("replica", False):
+        return ""
+    if "replay_lsn" not in db.info:
+        db.info["replay_lsn"] = await db.scalar(REPLAY_LSN) or ""
+    return db.info["replay_lsn"]
+
+async def replica_suffix(db) -> str:
+    """Key suffix for results read from a replica: they may lag behind a write the client
+    forces the primary to see, and only hold up to the replay position."""
+    if db is None or not db.info.get("replica", False):
+        return ""
+    return f":replica:{await replay_position(db)}"
+
+async def make_key(name: str, params: dict, tables) -> str:
+    normalized = {k: v for k, v in params.items() if k not in SKIP_PARAMS}
+    raw = json.dumps([normalized, await table_versions(tables)], sort_keys=True, default=_param_default)
+    return f"{name}:{hashlib.sha1(raw.encode()).hexdigest()}"
+
+def _entry(result, response) -> dict:
+    if isinstance(result, Response):
+        headers = {k: v for k, v in result.headers.items() if k != "content-length"}
+        return {"raw": result.body.decode(), "media_type": result.media_type, "headers": headers}
+    return {"body": jsonable_encoder(result), "headers": dict(response.headers)}
+
+def _replay(entry: dict, response):
+    headers = {**entry["headers"], "X-Cache": "HIT"}
+    if "raw" in entry:
+        return Response(entry["raw"], media_type=entry["media_type"], headers=headers)
+    response.headers.update(headers)
+    return entry["body"]
+
+def no_store(headers) -> bool:
+    """A handler marks a result it must not be cached with `Cache-Control: no-store`."""
+    return "no-store" in headers.get("cache-control", "")
+
+def cached(tables=CACHED_TABLES, ttl: int | None = None):
+    """Cache a read endpoint by its resolved parameters and the versions of `tables`.
+
+    The wrapped handler must take its parameters as keyword arguments (FastAPI always
+    does) and either return a Response or declare a `response: Response` parameter;
+    headers are cached together with the body, results sent with no-store are not cached.
+    """
+    def decorator(fn):
+        name = fn.__name__
+
+        @functools.wraps(fn)
+        async def wrapper(**kwargs):
+            if settings.cache_backend == "none":
+                return await fn(**kwargs)
+
+            response = kwargs.get("response")
+            key = await make_key(name + await replica_suffix(kwargs.get("db")), kwargs, tables)
+            hit = await cache_get(key)
+            if hit is not None:
+                stats[name]["hits"] += 1
+                return _replay(hit, response)
+
+            stats[name]["misses"] += 1
+            result = await fn(**kwargs)
+            headers = (result if isinstance(result, Response) else response).headers
+            if not no_store(headers):
+                await cache_set(key, _entry(result, response), ttl or settings.cache_ttl_s)
+            headers["X-Cache"] = "MISS"
+            return result
+
+        return wrapper
+    return decorator
+
+async def cache_info() -> dict:
+    return {
+        **await _call(backend.info),
+        "ttl_s": settings.cache_ttl_s,
+        "versions": await table_versions(CACHED_TABLES),
+        "endpoints": {k: dict(v) for k, v in stats.items()},
+    }
@@ -0,0 +1,51 @@
+import base64
+import json
+from fastapi import HTTPException
+from sqlalchemy import BigInteger, Text, cast, func, select, tuple_
+from .models import Order, OrderTombstone
+from .serializers import ORDER_COLUMNS, order_dict
+
+# Oldest transaction that may still commit. Sequence values are taken before commit, so
+# a lower updated_seq can become visible after a higher one; changes are therefore only
+# handed out once every transaction up to theirs has finished, in (xid, seq) order.
+SETTLED_XID = select(cast(cast(func.pg_snapshot_xmin(func.pg_current_snapshot()), Text), BigInteger))
+
+def encode_since(xid: int, seq: int) -> str:
+    raw = json.dumps([xid, seq], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_since(token: str) -> tuple[int, int]:
+    try:
+        xid, seq = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except (ValueError, TypeError):
+        raise HTTPException(400, "Invalid since token")
+    if not isinstance(xid, int) or not isinstance(seq, int):
+        raise HTTPException(400, "Invalid since token")
+    return xid, seq
+
+async def order_changes(db, since: str | None, limit: int) -> dict:
+    """Upserts and deletes after `since`, oldest first, at most `limit` of them.
+
+    An order changed several times is reported once, at its last change.
+    """
+    settled = await db.scalar(SETTLED_XID)
+    upserts = select(Order.updated_xid, Order.updated_seq, *ORDER_COLUMNS).where(Order.updated_xid < settled)
+    deletes = select(OrderTombstone.xid, OrderTombstone.seq, OrderTombstone.order_id).where(OrderTombstone.xid < settled)
+    if since:
+        after = decode_since(since)
+        upserts = upserts.where(tuple_(Order.updated_xid, Order.updated_seq) > after)
+        deletes = deletes.where(tuple_(OrderTombstone.xid, OrderTombstone.seq) > after)
+    upserts = upserts.order_by(Order.updated_xid, Order.updated_seq).limit(limit + 1)
+    deletes = deletes.order_by(OrderTombstone.xid, OrderTombstone.seq).limit(limit + 1)
+
+    changes = [((r.updated_xid, r.updated_seq), {"op": "upsert", "id": r.id, "order": order_dict(r)})
+               for r in (await db.execute(upserts)).all()]
+    changes += [((r.xid, r.seq), {"op": "delete", "id": r.order_id, "order": None})
+                for r in (await db.execute(deletes)).all()]
+    changes.sort(key=lambda c: c[0])
+    page = changes[:limit]
+    return {
+        "changes": [c for _, c in page],
+        "next_since": encode_since(*page[-1][0]) if page else since or encode_since(0, 0),
+        "has_more": len(changes) > limit,
+    }
@@ -0,0 +1,106 @@
+import zlib
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # br is offered only when the package is installed
+    brotli = None
+
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+class _Gzip:
+    def __init__(self):
+        self.z = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self.z.compress(data) + self.z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self.z.compress(data) + self.z.flush()
+
+class _Brotli:
+    def __init__(self):
+        self.c = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self.c.process(data) + self.c.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self.c.process(data) + self.c.finish()
+
+ENCODINGS = {"br": _Brotli, "gzip": _Gzip} if brotli else {"gzip": _Gzip}
+
+def negotiate(accept_encoding: str) -> str | None:
+    """Preferred encoding the client accepts (q > 0), br before gzip."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        q = 1.0
+        for p in params.split(";"):
+            key, _, value = p.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name.strip().lower()] = q
+    for encoding in ENCODINGS:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+class CompressionMiddleware:
+    """gzip / br for response bodies of at least `min_bytes`, streamed ones included.
+
+    Responses that are already encoded or carry a strong ETag (single resources,
+    whose tag promises these exact bytes for If-Match) are sent as they are.
+    """
+
+    def __init__(self, app, min_bytes: int):
+        self.app = app
+        self.min_bytes = min_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start = None
+        compressor = None
+
+        async def send_compressed(message):
+            nonlocal start, compressor
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                return await send(message)
+
+            if compressor is None:
+                body, more = message.get("body", b""), message.get("more_body", False)
+                headers = MutableHeaders(raw=start["headers"])
+                etag = headers.get("etag", "")
+                if ("content-encoding" in headers or (etag and not etag.startswith("W/"))
+                        or (not more and len(body) < self.min_bytes)):
+                    await send(start)
+                    start = None
+                    return await send(message)
+                compressor = ENCODINGS[encoding]()
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if not more:
+                    body = compressor.finish(body)
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    return await send({"type": "http.response.body", "body": body})
+                del headers["Content-Length"]
+                await send(start)
+
+            body, more = message.get("body", b""), message.get("more_body", False)
+            data = compressor.chunk(body) if more else compressor.finish(body)
+            await send({"type": "http.response.body", "body": data, "more_body": more})
+
+        await self.app(scope, receive, send_compressed)
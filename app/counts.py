@@ -0,0 +1,51 @@
+import json
+from fastapi import Response
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects import postgresql
+from .cache import cache_get, cache_set, make_key, replica_suffix
+from .config import settings
+
+TOTAL_COUNT_HEADER = "X-Total-Count"
+# "exact" or "estimate"
+TOTAL_COUNT_KIND_HEADER = "X-Total-Count-Kind"
+
+_dialect = postgresql.dialect(paramstyle="named")
+
+# plain tables and leaf partitions (a partitioned parent has no rows of its own);
+# reltuples is -1 until a table has been analyzed
+RELTUPLES = text(
+    "SELECT sum(c.reltuples), bool_or(c.reltuples < 0) FROM pg_class c "
+    "WHERE c.relkind = 'r' AND (c.oid = CAST(:table AS regclass) "
+    "OR c.oid IN (SELECT relid FROM pg_partition_tree(CAST(:table AS regclass))))"
+)
+
+async def estimate_rows(db, q) -> int:
+    """Planner row estimate for `q` (EXPLAIN only, nothing is executed)."""
+    compiled = q.compile(dialect=_dialect, compile_kwargs={"render_postcompile": True})
+    plan = (await db.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}"), compiled.params)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+async def set_total_count(response: Response, db, name: str, q, filters: dict, tables, table: str | None = None):
+    """Set X-Total-Count for the unpaginated query `q`.
+
+    Estimates first: `pg_class.reltuples` of `table` when the list is unfiltered, the
+    planner's estimate otherwise. Up to COUNT_EXACT_THRESHOLD rows the count is exact
+    and cached per `filters` and the versions of `tables`, so any write resets it; a count
+    read on a replica is cached per replay position, like @cached responses.
+    """
+    key = await make_key(f"count:{name}" + await replica_suffix(db), filters, tables)
+    exact = await cache_get(key)
+    if exact is None:
+        estimate, unknown = (await db.execute(RELTUPLES, {"table": table})).one() if table else (None, True)
+        estimate = await estimate_rows(db, q) if unknown else int(estimate)
+        if estimate > settings.count_exact_threshold:
+            response.headers[TOTAL_COUNT_HEADER] = str(estimate)
+            response.headers[TOTAL_COUNT_KIND_HEADER] = "estimate"
+            return
+        exact = await db.scalar(select(func.count()).select_from(q.order_by(None).subquery()))
+        if settings.cache_backend != "none":
+            await cache_set(key, exact, settings.cache_ttl_s)
+    response.headers[TOTAL_COUNT_HEADER] = str(exact)
+    response.headers[TOTAL_COUNT_KIND_HEADER] = "exact"
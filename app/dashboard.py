@@ -0,0 +1,107 @@
+import asyncio
+import logging
+import time
+from fastapi import HTTPException
+from sqlalchemy import func, select, text
+from sqlalchemy.exc import DBAPIError
+from .deps import open_session
+from .jobs import OVERDUE
+from .models import Mechanic, MechanicDailyRevenue, Order
+from .serializers import ORDER_COLUMNS, order_dict
+
+log = logging.getLogger(__name__)
+
+# in DB_MODE=sync a cancelled panel keeps its thread until the statement ends, so the
+# server-side timeout is meant to fire first
+BACKSTOP_GRACE_S = 0.5
+
+def _window(q, column, issue_from, issue_to):
+    if issue_from:
+        q = q.where(column >= issue_from)
+    if issue_to:
+        q = q.where(column <= issue_to)
+    return q
+
+async def revenue_by_mechanic(db, issue_from, issue_to):
+    R = MechanicDailyRevenue
+    revenue = func.sum(R.revenue)
+    q = (
+        select(Mechanic.id, Mechanic.full_name, revenue.label("revenue"), func.sum(R.orders_count).label("orders_count"))
+        .join(R, R.mechanic_id == Mechanic.id)
+        .group_by(Mechanic.id, Mechanic.full_name)
+        .having(func.sum(R.orders_count) > 0)
+        .order_by(revenue.desc())
+        .limit(10)
+    )
+    rows = (await db.execute(_window(q, R.day, issue_from, issue_to))).all()
+    return [{"mechanic_id": r.id, "full_name": r.full_name, "revenue": float(r.revenue or 0), "orders_count": int(r.orders_count)}
+            for r in rows]
+
+async def revenue_by_day(db, issue_from, issue_to):
+    R = MechanicDailyRevenue
+    q = select(R.day, func.sum(R.revenue).label("revenue"), func.sum(R.orders_count).label("orders_count")).group_by(R.day).order_by(R.day)
+    rows = (await db.execute(_window(q, R.day, issue_from, issue_to))).all()
+    return [{"day": r.day, "revenue": float(r.revenue or 0), "orders_count": int(r.orders_count)} for r in rows]
+
+async def orders_by_status(db, issue_from, issue_to):
+    q = select(Order.status, func.count().label("orders_count"), func.sum(Order.cost).label("cost")).group_by(Order.status)
+    rows = (await db.execute(_window(q, Order.issue_date, issue_from, issue_to))).all()
+    return {r.status: {"orders_count": r.orders_count, "cost": float(r.cost or 0)} for r in rows}
+
+async def overdue(db, issue_from, issue_to):
+    q = select(func.count()).select_from(Order).where(OVERDUE)
+    return {"orders_count": await db.scalar(_window(q, Order.issue_date, issue_from, issue_to))}
+
+async def recent_orders(db, issue_from, issue_to):
+    q = select(*ORDER_COLUMNS).order_by(Order.issue_date.desc(), Order.id.desc()).limit(10)
+    return [order_dict(r) for r in (await db.execute(_window(q, Order.issue_date, issue_from, issue_to))).all()]
+
+# name -> query; each runs on its own pooled session
+PANELS = {
+    "revenue_by_mechanic": revenue_by_mechanic,
+    "revenue_by_day": revenue_by_day,
+    "orders_by_status": orders_by_status,
+    "overdue": overdue,
+    "recent_orders": recent_orders,
+}
+
+def parse_panels(panels: str | None) -> list[str]:
+    if panels is None:
+        return list(PANELS)
+    names = list(dict.fromkeys(p.strip() for p in panels.split(",") if p.strip()))
+    unknown = [n for n in names if n not in PANELS]
+    if unknown or not names:
+        raise HTTPException(400, f"Unknown panels: {', '.join(unknown)}" if unknown else "No panels requested")
+    return names
+
+async def _run_panel(name: str, replica: bool, timeout_ms: int, params: dict):
+    async with open_session(replica) as db:
+        # the server stops the statement, so a timed-out panel does not keep its connection busy
+        await db.execute(text(f"SET LOCAL statement_timeout = {int(timeout_ms)}"))
+        return await PANELS[name](db, **params)
+
+def _is_timeout(e: Exception) -> bool:
+    return isinstance(e, asyncio.TimeoutError) or (isinstance(e, DBAPIError) and getattr(e.orig, "sqlstate", None) == "57014")
+
+async def _timed(name: str, replica: bool, timeout_ms: int, params: dict):
+    t0 = time.perf_counter()
+    result, error = None, None
+    try:
+        # statement_timeout normally ends the panel; this also bounds the wait for a pooled connection
+        result = await asyncio.wait_for(_run_panel(name, replica, timeout_ms, params), timeout_ms / 1000 + BACKSTOP_GRACE_S)
+    except Exception as e:
+        error = "timeout" if _is_timeout(e) else "error"
+        if error == "error":
+            log.exception("dashboard panel %s failed", name)
+    return name, result, error, round((time.perf_counter() - t0) * 1000, 2)
+
+async def dashboard(names: list[str], replica: bool, timeout_ms: int, **params) -> dict:
+    """Run the panels concurrently; one that fails or exceeds `timeout_ms` is reported
+    in `errors` and left out of `panels`, the others are returned as usual."""
+    results = await asyncio.gather(*(_timed(n, replica, timeout_ms, params) for n in names))
+    return {
+        "panels": {n: r for n, r, e, _ in results if e is None},
+        "errors": {n: e for n, _, e, _ in results if e is not None},
+        "timings_ms": {n: ms for n, _, _, ms in results},
+        "partial": any(e is not None for _, _, e, _ in results),
+    }
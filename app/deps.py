@@ -1,8 +1,31 @@
-from .database import SessionLocal
+from contextlib import asynccontextmanager
+from fastapi import Depends, Request
+from .config import settings
+from .database import SessionLocal, AsyncSessionLocal, ReadSessionLocal, AsyncReadSessionLocal, ThreadedSession
 
-def get_db():
-    db = SessionLocal()
+# read endpoints use the replica unless the client asks for the primary, e.g. to read its own writes
+PRIMARY_HEADER = "X-Read-Primary"
+
+@asynccontextmanager
+async def open_session(replica: bool = False):
+    if settings.db_mode == "async":
+        async with (AsyncReadSessionLocal if replica else AsyncSessionLocal)() as db:
+            yield db
+        return
+
+    db = ThreadedSession((ReadSessionLocal if replica else SessionLocal)())
     try:
         yield db
     finally:
-        db.close()
+        await db.close()
+
+async def get_db():
+    async with open_session() as db:
+        yield db
+
+def use_replica(request: Request) -> bool:
+    return bool(settings.database_read_url) and request.headers.get(PRIMARY_HEADER, "").lower() not in ("1", "true", "yes")
+
+async def get_read_db(replica: bool = Depends(use_replica)):
+    async with open_session(replica) as db:
+        yield db
@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import select
+from .cache import table_versions
+from .config import settings
+from .models import Car, Mechanic
+from .serializers import CAR_COLUMNS, MECHANIC_COLUMNS, car_dict, mechanic_dict
+
+class DimensionCache:
+    """Serialized rows of a dimension table by id, for attaching to order rows.
+
+    Rows are loaded on demand, only for the ids a page needs, and kept for `ttl` seconds.
+    Every committed write to the table bumps its cache version (see app.cache); the next
+    lookup then starts over, so updates, deletes and cascades never have to be tracked
+    row by row. The TTL bounds staleness for writes this process does not see: another
+    worker's, with CACHE_BACKEND=memory, or the API bypassed.
+    """
+
+    def __init__(self, model, columns, to_dict, max_entries: int, ttl: float):
+        self.model = model
+        self.columns = columns
+        self.to_dict = to_dict
+        self.table = model.__tablename__
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.rows: OrderedDict[int, tuple[float, dict]] = OrderedDict()
+        self.version: int | None = None
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    async def _load(self, db, ids) -> dict[int, dict]:
+        rows = (await db.execute(select(*self.columns).where(self.model.id.in_(ids)))).all()
+        return {r.id: self.to_dict(r) for r in rows}
+
+    async def get_many(self, db, ids) -> dict[int, dict]:
+        if db.info.get("replica", False):
+            # a replica may not have replayed a write the version already counts, so rows
+            # read there could be kept under the new version; they are used, never cached
+            self.misses += len(ids)
+            return await self._load(db, set(ids))
+
+        version = (await table_versions((self.table,)))[self.table]
+        now = time.monotonic()
+        found = {}
+        with self.lock:
+            if version != self.version:
+                self.rows.clear()
+                self.version = version
+            for i in ids:
+                item = self.rows.get(i)
+                if item is None:
+                    continue
+                if item[0] < now:
+                    del self.rows[i]
+                    continue
+                self.rows.move_to_end(i)
+                found[i] = item[1]
+        missing = set(ids) - found.keys()
+        self.hits += len(found)
+        self.misses += len(missing)
+        if not missing:
+            return found
+
+        loaded = await self._load(db, missing)
+        expires = time.monotonic() + self.ttl
+        with self.lock:
+            # a write committed while loading makes these rows suspect; use them, don't keep them
+            if self.version == version:
+                self.rows.update((i, (expires, row)) for i, row in loaded.items())
+                while len(self.rows) > self.max_entries:
+                    self.rows.popitem(last=False)
+        return found | loaded
+
+    def info(self) -> dict:
+        return {"entries": len(self.rows), "ttl_s": self.ttl, "version": self.version, "hits": self.hits, "misses": self.misses}
+
+_caches: dict[str, DimensionCache] = {}
+
+def _cache(model, columns, to_dict) -> DimensionCache:
+    table = model.__tablename__
+    if table not in _caches:
+        _caches[table] = DimensionCache(
+            model, columns, to_dict, settings.dimension_cache_max_entries, settings.dimension_cache_ttl_s,
+        )
+    return _caches[table]
+
+async def cars(db, ids) -> dict[int, dict]:
+    return await _cache(Car, CAR_COLUMNS, car_dict).get_many(db, ids)
+
+async def mechanics(db, ids) -> dict[int, dict]:
+    return await _cache(Mechanic, MECHANIC_COLUMNS, mechanic_dict).get_many(db, ids)
+
+def dimension_info() -> dict:
+    return {table: c.info() for table, c in _caches.items()}
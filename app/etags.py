@@ -0,0 +1,90 @@
+import functools
+import hashlib
+from fastapi import HTTPException, Response
+from sqlalchemy import Text, cast, false, literal_column, select, true
+from .cache import CACHED_TABLES, backend, make_key, no_store, replay_position
+from .models import Order
+
+def row_version(model):
+    """Version of a single row: updated_seq for orders (migration 0012); cars and
+    mechanics use the system column xmin, which every update of the row changes."""
+    col = model.updated_seq if model is Order else literal_column(f"{model.__tablename__}.xmin")
+    return cast(col, Text).label("version")
+
+def row_etag(version) -> str:
+    return f'"{version}"'
+
+def _tags(header: str) -> list[str]:
+    return [t.strip() for t in header.split(",") if t.strip()]
+
+def none_match(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match uses the weak comparison: W/"x" matches "x"."""
+    if if_none_match is None:
+        return False
+    bare = etag.removeprefix("W/")
+    return any(t == "*" or t.removeprefix("W/") == bare for t in _tags(if_none_match))
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
+
+def version_matches(model, if_match: str):
+    """WHERE condition for If-Match; the strong comparison never matches a weak tag."""
+    tags = _tags(if_match)
+    if "*" in tags:
+        return true()
+    versions = [t[1:-1] for t in tags if len(t) >= 2 and t[0] == t[-1] == '"']
+    return row_version(model).in_(versions) if versions else false()
+
+async def raise_unmatched(db, model, ident: int, if_match: str | None, detail: str):
+    """After a write matched no row: 412 if the row exists but If-Match did not, else 404."""
+    if if_match is not None and await db.scalar(select(model.id).where(model.id == ident)) is not None:
+        raise HTTPException(412, "If-Match does not match the current version")
+    raise HTTPException(404, detail)
+
+async def check_if_match(db, model, ident: int, if_match: str | None, detail: str):
+    """Lock the row and compare its version with If-Match before deleting it."""
+    if if_match is None:
+        return
+    version = await db.scalar(select(row_version(model)).where(model.id == ident).with_for_update())
+    if version is None:
+        raise HTTPException(404, detail)
+    tags = _tags(if_match)
+    if "*" not in tags and row_etag(version) not in tags:
+        raise HTTPException(412, "If-Match does not match the current version")
+
+async def tables_etag(name: str, params: dict, tables, db) -> str:
+    """Weak ETag from the request parameters and the versions of `tables`."""
+    parts = [await make_key(name, params, tables), await replay_position(db)]
+    return f'W/"{hashlib.sha1("|".join(parts).encode()).hexdigest()[:20]}"'
+
+def conditional(tables=CACHED_TABLES):
+    """ETag for a read endpoint, derived like the @cached key (on a replica plus its
+    replay position); a matching If-None-Match is answered with 304 before the handler
+    is called.
+
+    Table versions must be shared by every worker, so this needs CACHE_BACKEND=redis;
+    with the per-process memory backend another worker's write would leave the tag
+    unchanged, and the endpoint sends no ETag at all.
+
+    The handler must declare `if_none_match: str | None = Header(None)` and, as for
+    @cached, return a Response or declare `response: Response`; no-store results get
+    no ETag.
+    """
+    def decorator(fn):
+        name = fn.__name__
+
+        @functools.wraps(fn)
+        async def wrapper(**kwargs):
+            if not backend.shared:
+                return await fn(**kwargs)
+            etag = await tables_etag(name, kwargs, tables, kwargs["db"])
+            if none_match(kwargs.get("if_none_match"), etag):
+                return not_modified(etag)
+            result = await fn(**kwargs)
+            headers = (result if isinstance(result, Response) else kwargs["response"]).headers
+            if not no_store(headers):
+                headers["ETag"] = etag
+            return result
+
+        return wrapper
+    return decorator
@@ -0,0 +1,41 @@
+import csv
+import io
+import orjson
+from .deps import open_session
+from .serializers import ORDER_COLUMNS, order_dict
+
+EXPORT_BATCH = 2000
+
+EXPORT_FIELDS = [c.key for c in ORDER_COLUMNS]
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+def _ndjson(rows) -> bytes:
+    return b"".join(orjson.dumps(order_dict(r)) + b"\n" for r in rows)
+
+def _csv(rows, header: bool) -> bytes:
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    if header:
+        w.writerow(EXPORT_FIELDS)
+    for r in rows:
+        rec = order_dict(r)
+        rec["meta"] = orjson.dumps(rec["meta"]).decode()
+        w.writerow(rec[k] for k in EXPORT_FIELDS)
+    return buf.getvalue().encode()
+
+async def stream_orders(q, fmt: str, replica: bool = False):
+    """Yield encoded chunks of `q` read through a server-side cursor, one chunk per batch.
+
+    The session is opened here rather than taken from get_db: the dependency is closed
+    before a StreamingResponse starts sending its body.
+    """
+    q = q.execution_options(yield_per=EXPORT_BATCH)
+    async with open_session(replica) as db:
+        result = await db.stream(q)
+        first = True
+        async for rows in result.partitions(EXPORT_BATCH):
+            yield _csv(rows, header=first) if fmt == "csv" else _ndjson(rows)
+            first = False
+        if first and fmt == "csv":
+            yield _csv([], header=True)
@@ -0,0 +1,85 @@
+import json
+from datetime import date
+from fastapi import HTTPException, Query
+from sqlalchemy import Text, and_, cast, func, literal_column
+from sqlalchemy.dialects.postgresql import DATERANGE, JSONPATH
+from .models import Order, Car, Mechanic
+
+# SQLSTATEs Postgres raises for malformed search input -> 400 detail
+META_INPUT_ERRORS = {"42601": "Invalid jsonpath", "2201B": "Invalid regex pattern"}
+
+class OrderFilter:
+    """Query parameters shared by /analytics/orders/filter and /orders/export."""
+
+    def __init__(
+        self,
+        brand: str | None = None,
+        min_cost: float | None = Query(None, ge=0),
+        max_cost: float | None = Query(None, ge=0),
+        grade_gte: int | None = Query(None, ge=1),
+        issue_from: date | None = None,
+        issue_to: date | None = None,
+    ):
+        self.brand = brand
+        self.min_cost = min_cost
+        self.max_cost = max_cost
+        self.grade_gte = grade_gte
+        self.issue_from = issue_from
+        self.issue_to = issue_to
+
+    def apply(self, q):
+        conditions = []
+
+        if self.brand:
+            q = q.join(Car, Order.car_id == Car.id)
+            conditions.append(Car.brand == self.brand)
+        if self.grade_gte is not None:
+            q = q.join(Mechanic, Order.mechanic_id == Mechanic.id)
+            conditions.append(Mechanic.grade >= self.grade_gte)
+        if self.min_cost is not None:
+            conditions.append(Order.cost >= self.min_cost)
+        if self.max_cost is not None:
+            conditions.append(Order.cost <= self.max_cost)
+        if self.issue_from:
+            conditions.append(Order.issue_date >= self.issue_from)
+        if self.issue_to:
+            conditions.append(Order.issue_date <= self.issue_to)
+
+        if conditions:
+            q = q.where(and_(*conditions))
+        return q
+
+def meta_conditions(pattern: str | None, meta_contains: str | None, jsonpath: str | None) -> list:
+    """WHERE clauses for /analytics/orders/search-meta; the given modes are ANDed."""
+    conditions = []
+    if pattern:
+        conditions.append(cast(Order.meta, Text).op("~")(pattern))
+    if meta_contains:
+        try:
+            doc = json.loads(meta_contains)
+        except ValueError:
+            raise HTTPException(400, "meta_contains must be valid JSON")
+        if not isinstance(doc, (dict, list)):
+            raise HTTPException(400, "meta_contains must be a JSON object or array")
+        # @> and @? are served by the jsonb_path_ops GIN index
+        conditions.append(Order.meta.contains(doc))
+    if jsonpath:
+        conditions.append(Order.meta.path_exists(cast(jsonpath, JSONPATH)))
+    if not conditions:
+        raise HTTPException(400, "One of pattern, meta_contains or jsonpath is required")
+    return conditions
+
+class Period:
+    """date_from / date_to query parameters of the scheduling endpoints, both days included."""
+
+    def __init__(self, date_from: date, date_to: date):
+        if date_to < date_from:
+            raise HTTPException(400, "date_to must not be before date_from")
+        self.date_from = date_from
+        self.date_to = date_to
+
+    def overlaps(self):
+        """Orders whose work_period overlaps the period; && is served by the GiST index."""
+        period = func.daterange(self.date_from, self.date_to, literal_column("'[]'"), type_=DATERANGE)
+        # orders issued after the period cannot overlap it, which also prunes later partitions
+        return and_(Order.work_period.op("&&")(period), Order.issue_date <= self.date_to)
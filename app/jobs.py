@@ -0,0 +1,112 @@
+import asyncio
+import logging
+from datetime import timedelta
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from .config import settings
+from .deps import open_session
+from .models import Job, Order
+
+log = logging.getLogger(__name__)
+
+ACTIVE = ("queued", "running")
+# a running job that has not committed a batch for this long is considered abandoned
+# (e.g. its worker died) and may be claimed again
+STALE_AFTER = timedelta(minutes=5)
+
+OVERDUE = and_(Order.actual_end_date > Order.planned_end_date, Order.status != "done")
+
+async def close_overdue_batch(db, batch_size: int) -> int:
+    """Close up to `batch_size` overdue orders, skipping rows other transactions hold locked."""
+    rows = (await db.execute(
+        select(Order.id, Order.issue_date).where(OVERDUE).limit(batch_size).with_for_update(skip_locked=True)
+    )).all()
+    if not rows:
+        return 0
+    # literal issue dates let the planner prune to the batch's partitions; joining a CTE
+    # instead hashes every partition of orders on each batch
+    stmt = (
+        update(Order)
+        .where(Order.id.in_([r.id for r in rows]), Order.issue_date.in_({r.issue_date for r in rows}))
+        .values(status="done")
+        .execution_options(synchronize_session=False)
+    )
+    return (await db.execute(stmt)).rowcount
+
+# kind -> (one batch; returns rows changed, query for the rows left to do)
+JOBS = {
+    "close_overdue": (close_overdue_batch, select(func.count()).select_from(Order).where(OVERDUE)),
+}
+
+_tasks: set[asyncio.Task] = set()
+
+def _start(job_id: int):
+    task = asyncio.create_task(run(job_id))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+def _claimable():
+    stale = and_(Job.status == "running", Job.updated_at < func.now() - STALE_AFTER)
+    return or_(Job.status == "queued", stale)
+
+async def enqueue(db, kind: str, params: dict) -> Job:
+    """Queue a job and start it in this process; if one of `kind` is already active, return that one."""
+    job = Job(kind=kind, params=params)
+    db.add(job)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        job = await db.scalar(select(Job).where(Job.kind == kind, Job.status.in_(ACTIVE)))
+        if job is None:  # finished in the meantime
+            return await enqueue(db, kind, params)
+        if await db.scalar(select(_claimable()).where(Job.id == job.id)):
+            _start(job.id)
+        return job
+    await db.refresh(job)
+    _start(job.id)
+    return job
+
+async def _progress(db, job_id: int, **values):
+    await db.execute(update(Job).where(Job.id == job_id).values(updated_at=func.now(), **values))
+    await db.commit()
+
+async def run(job_id: int):
+    async with open_session() as db:
+        claimed = (await db.execute(
+            update(Job)
+            .where(Job.id == job_id, _claimable())
+            .values(status="running", started_at=func.coalesce(Job.started_at, func.now()), updated_at=func.now())
+            .returning(Job.kind, Job.params)
+        )).first()
+        await db.commit()
+        if claimed is None:
+            return  # taken by another worker, or already finished
+
+        batch, remaining = JOBS[claimed.kind]
+        try:
+            await _progress(db, job_id, total=Job.processed + await db.scalar(remaining))
+            while True:
+                n = await batch(db, **claimed.params)
+                if not n:
+                    break
+                # the batch and its progress commit together, releasing the batch's row locks
+                await _progress(db, job_id, processed=Job.processed + n, batches=Job.batches + 1)
+                if settings.job_batch_pause_ms:
+                    await asyncio.sleep(settings.job_batch_pause_ms / 1000)
+            await _progress(db, job_id, status="done", finished_at=func.now())
+        except Exception as e:
+            await db.rollback()
+            log.exception("job %s (%s) failed", job_id, claimed.kind)
+            await _progress(db, job_id, status="failed", error=str(e), finished_at=func.now())
+
+async def resume_on_startup():
+    """Start queued jobs and take over abandoned ones, e.g. after a restart."""
+    try:
+        async with open_session() as db:
+            ids = (await db.scalars(select(Job.id).where(_claimable()).order_by(Job.id))).all()
+    except DBAPIError as e:
+        log.warning("could not resume jobs: %s", e.orig)
+        return
+    for job_id in ids:
+        _start(job_id)
@@ -1,9 +1,26 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from .routers import cars, mechanics, orders, analytics
+from starlette.concurrency import run_in_threadpool
+from .config import settings
+from . import jobs, partitions, profiler
+from .compression import CompressionMiddleware
+from .routers import cars, mechanics, orders, analytics, internal
 
-app = FastAPI(title="Autoservice REST API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await run_in_threadpool(partitions.ensure_on_startup)
+    await jobs.resume_on_startup()
+    yield
+
+app = FastAPI(title="Autoservice REST API", lifespan=lifespan)
+
+if settings.sql_profiling:
+    profiler.install(app)
+if settings.compression_min_bytes > 0:
+    app.add_middleware(CompressionMiddleware, min_bytes=settings.compression_min_bytes)
 
 app.include_router(cars.router, prefix="/cars", tags=["cars"])
 app.include_router(mechanics.router, prefix="/mechanics", tags=["mechanics"])
 app.include_router(orders.router, prefix="/orders", tags=["orders"])
 app.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
+app.include_router(internal.router, prefix="/internal", tags=["internal"])
@@ -0,0 +1,45 @@
+import bisect
+import threading
+
+DEFAULT_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+class Histogram:
+    """Thread-safe cumulative histogram of durations in milliseconds."""
+
+    def __init__(self, buckets_ms=DEFAULT_BUCKETS_MS):
+        self.buckets = tuple(buckets_ms)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, ms: float):
+        with self.lock:
+            self.counts[bisect.bisect_left(self.buckets, ms)] += 1
+            self.count += 1
+            self.sum_ms += ms
+            self.max_ms = max(self.max_ms, ms)
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            cumulative, total = {}, 0
+            for le, n in zip((*self.buckets, "inf"), self.counts):
+                total += n
+                cumulative[f"le_{le}"] = total
+            return {
+                "count": self.count,
+                "sum_ms": round(self.sum_ms, 3),
+                "avg_ms": round(self.sum_ms / self.count, 3) if self.count else 0.0,
+                "max_ms": round(self.max_ms, 3),
+                "buckets": cumulative,
+            }
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def inc(self, n: int = 1):
+        with self.lock:
+            self.value += n
@@ -1,5 +1,5 @@
-from sqlalchemy import String, Integer, ForeignKey, Date, Numeric, Index
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import BigInteger, String, Integer, ForeignKey, Date, DateTime, Numeric, Index, Computed, Text, func, text
+from sqlalchemy.dialects.postgresql import DATERANGE, JSONB, TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .database import Base
 
@@ -7,9 +7,9 @@ class Car(Base):
     __tablename__ = "cars"
     id: Mapped[int] = mapped_column(primary_key=True)
     number: Mapped[str] = mapped_column(String(32), unique=True, index=True)
-    brand: Mapped[str] = mapped_column(String(64), index=True)
-    year: Mapped[int] = mapped_column(Integer, index=True)
-    owner_name: Mapped[str] = mapped_column(String(128), index=True)
+    brand: Mapped[str] = mapped_column(String(64))
+    year: Mapped[int] = mapped_column(Integer)
+    owner_name: Mapped[str] = mapped_column(String(128))
 
     orders = relationship("Order", back_populates="car", cascade="all,delete")
 
@@ -17,29 +17,106 @@ class Mechanic(Base):
     __tablename__ = "mechanics"
     id: Mapped[int] = mapped_column(primary_key=True)
     employee_no: Mapped[str] = mapped_column(String(32), unique=True, index=True)
-    full_name: Mapped[str] = mapped_column(String(128), index=True)
-    experience_years: Mapped[int] = mapped_column(Integer, index=True)
-    grade: Mapped[int] = mapped_column(Integer, index=True)
+    full_name: Mapped[str] = mapped_column(String(128))
+    experience_years: Mapped[int] = mapped_column(Integer)
+    grade: Mapped[int] = mapped_column(Integer)
 
     orders = relationship("Order", back_populates="mechanic", cascade="all,delete")
 
+# range-partitioned by month on issue_date (migration 0007); in the database the
+# primary key is (id, issue_date), ids still come from a single sequence
 class Order(Base):
     __tablename__ = "orders"
     id: Mapped[int] = mapped_column(primary_key=True)
 
-    car_id: Mapped[int] = mapped_column(ForeignKey("cars.id", ondelete="CASCADE"), index=True)
-    mechanic_id: Mapped[int] = mapped_column(ForeignKey("mechanics.id", ondelete="CASCADE"), index=True)
+    car_id: Mapped[int] = mapped_column(ForeignKey("cars.id", ondelete="CASCADE"))
+    mechanic_id: Mapped[int] = mapped_column(ForeignKey("mechanics.id", ondelete="CASCADE"))
 
-    cost: Mapped[float] = mapped_column(Numeric(12, 2), index=True)
-    issue_date: Mapped["Date"] = mapped_column(Date, index=True)
-    work_type: Mapped[str] = mapped_column(String(128), index=True)
-    planned_end_date: Mapped["Date"] = mapped_column(Date, index=True)
-    actual_end_date: Mapped["Date | None"] = mapped_column(Date, nullable=True, index=True)
+    cost: Mapped[float] = mapped_column(Numeric(12, 2))
+    issue_date: Mapped["Date"] = mapped_column(Date)
+    work_type: Mapped[str] = mapped_column(String(128))
+    planned_end_date: Mapped["Date"] = mapped_column(Date)
+    actual_end_date: Mapped["Date | None"] = mapped_column(Date, nullable=True)
 
     status: Mapped[str] = mapped_column(String(32), server_default="new", nullable=False)
     meta: Mapped[dict] = mapped_column(JSONB, default=dict)
+    # full-text search document, generated by Postgres (migration 0009); never loaded by default
+    search_tsv: Mapped[str | None] = mapped_column(TSVECTOR, Computed(
+        "setweight(to_tsvector('russian', coalesce(work_type, '') || ' ' || coalesce(meta->>'symptoms', '')), 'A') || "
+        "setweight(to_tsvector('russian', coalesce(meta->>'comment', '')), 'B') || "
+        "setweight(to_tsvector('english', coalesce(work_type, '') || ' ' || coalesce(meta->>'symptoms', '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(meta->>'comment', '')), 'B')",
+        persisted=True,
+    ), deferred=True)
+    # [issue_date, actual or planned end], generated by Postgres (migration 0011)
+    work_period: Mapped[object | None] = mapped_column(DATERANGE, Computed(
+        "daterange(issue_date, greatest(coalesce(actual_end_date, planned_end_date), issue_date), '[]')",
+        persisted=True,
+    ), deferred=True)
+    # change feed (migration 0012): set on insert by the column defaults, on update by a trigger
+    updated_seq: Mapped[int] = mapped_column(BigInteger, server_default=text("nextval('orders_change_seq')"), deferred=True)
+    updated_xid: Mapped[int] = mapped_column(BigInteger, server_default=text("pg_current_xact_id()::text::bigint"), deferred=True)
 
     car = relationship("Car", back_populates="orders")
     mechanic = relationship("Mechanic", back_populates="orders")
 
-Index("ix_orders_car_mechanic", Order.car_id, Order.mechanic_id)
+# composite / covering / partial indexes for the analytics query shapes (migration 0006)
+Index("ix_orders_car_id_issue_date", Order.car_id, Order.issue_date, postgresql_include=["cost"])
+Index("ix_orders_mechanic_id_issue_date", Order.mechanic_id, Order.issue_date, postgresql_include=["cost"])
+Index(
+    "ix_orders_overdue", Order.id,
+    postgresql_where=(Order.actual_end_date > Order.planned_end_date) & (Order.status != "done"),
+)
+Index("ix_orders_work_type_issue_date", Order.work_type, Order.issue_date)
+Index("ix_orders_search_tsv", Order.search_tsv, postgresql_using="gin")
+Index("ix_orders_mechanic_id_work_period", Order.mechanic_id, Order.work_period, postgresql_using="gist")
+Index("ix_orders_updated_xid_updated_seq", Order.updated_xid, Order.updated_seq)
+Index("ix_orders_meta_path_ops", Order.meta, postgresql_using="gin", postgresql_ops={"meta": "jsonb_path_ops"})
+
+# keyset pagination: ORDER BY <sort column>, id
+Index("ix_orders_cost_id", Order.cost, Order.id)
+Index("ix_orders_issue_date_id", Order.issue_date, Order.id, postgresql_include=["mechanic_id", "cost"])
+Index("ix_orders_planned_end_date_id", Order.planned_end_date, Order.id)
+Index("ix_orders_actual_end_date_id", Order.actual_end_date, Order.id)
+Index("ix_orders_work_type_id", Order.work_type, Order.id)
+Index("ix_orders_status_id", Order.status, Order.id)
+Index("ix_cars_brand_id", Car.brand, Car.id)
+Index("ix_cars_year_id", Car.year, Car.id)
+Index("ix_mechanics_experience_years_id", Mechanic.experience_years, Mechanic.id)
+Index("ix_mechanics_grade_id", Mechanic.grade, Mechanic.id)
+
+# ids of deleted orders for the change feed, written by a trigger on orders (migration 0012)
+class OrderTombstone(Base):
+    __tablename__ = "order_tombstones"
+    seq: Mapped[int] = mapped_column(BigInteger, server_default=text("nextval('orders_change_seq')"), primary_key=True)
+    xid: Mapped[int] = mapped_column(BigInteger, server_default=text("pg_current_xact_id()::text::bigint"))
+    order_id: Mapped[int] = mapped_column(Integer)
+    deleted_at: Mapped["DateTime"] = mapped_column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+Index("ix_order_tombstones_xid_seq", OrderTombstone.xid, OrderTombstone.seq)
+
+# maintained by statement-level triggers on orders (migration 0005)
+class MechanicDailyRevenue(Base):
+    __tablename__ = "mechanic_daily_revenue"
+    mechanic_id: Mapped[int] = mapped_column(ForeignKey("mechanics.id", ondelete="CASCADE"), primary_key=True)
+    day: Mapped["Date"] = mapped_column(Date, primary_key=True, index=True)
+    revenue: Mapped[float] = mapped_column(Numeric(14, 2), server_default="0")
+    orders_count: Mapped[int] = mapped_column(Integer, server_default="0")
+
+# background jobs (app/jobs.py); progress is committed together with every batch
+class Job(Base):
+    __tablename__ = "jobs"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    kind: Mapped[str] = mapped_column(String(64))
+    status: Mapped[str] = mapped_column(String(16), server_default="queued")
+    params: Mapped[dict] = mapped_column(JSONB, server_default="{}")
+    total: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    processed: Mapped[int] = mapped_column(Integer, server_default="0")
+    batches: Mapped[int] = mapped_column(Integer, server_default="0")
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped["DateTime"] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    started_at: Mapped["DateTime | None"] = mapped_column(DateTime(timezone=True), nullable=True)
+    updated_at: Mapped["DateTime"] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    finished_at: Mapped["DateTime | None"] = mapped_column(DateTime(timezone=True), nullable=True)
+
+Index("ux_jobs_active_kind", Job.kind, unique=True, postgresql_where=Job.status.in_(["queued", "running"]))
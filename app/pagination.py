@@ -0,0 +1,97 @@
+import base64
+import json
+from datetime import date
+from decimal import Decimal
+from fastapi import HTTPException, Response
+from sqlalchemy import Date, Integer, Numeric, String, or_, tuple_
+from .models import Car, Mechanic, Order
+from .serializers import CAR_COLUMNS, MECHANIC_COLUMNS, ORDER_COLUMNS
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# column types with a total order whose values round-trip through a cursor (_dump/_load);
+# JSONB, ranges and tsvector are not sortable
+ORDERABLE_TYPES = (Integer, Numeric, String, Date)
+
+# only columns the list endpoints select: the next cursor is read from the last row
+SORTABLE = {
+    table.__tablename__: {c.key for c in columns if isinstance(c.type, ORDERABLE_TYPES)}
+    for table, columns in ((Order, ORDER_COLUMNS), (Car, CAR_COLUMNS), (Mechanic, MECHANIC_COLUMNS))
+}
+
+def sort_column(model, sort_by: str):
+    if sort_by not in SORTABLE.get(model.__tablename__, ()):
+        raise HTTPException(400, f"Invalid sort_by: {sort_by}")
+    return getattr(model, sort_by)
+
+def _dump(value):
+    if isinstance(value, (date, Decimal)):
+        return str(value)
+    return value
+
+def _load(column, value):
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
+
+def encode_cursor(sort_by: str, sort_dir: str, value, last_id: int) -> str:
+    raw = json.dumps([sort_by, sort_dir, _dump(value), last_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def _decode(token: str, sort_by: str, sort_dir: str, load):
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        c_sort_by, c_sort_dir, value, last_id = json.loads(raw)
+        value = load(value)
+    except Exception:
+        raise HTTPException(400, "Invalid cursor")
+    if (c_sort_by, c_sort_dir) != (sort_by, sort_dir) or not isinstance(last_id, int):
+        raise HTTPException(400, "Cursor does not match sort_by/sort_dir")
+    return value, last_id
+
+def decode_cursor(token: str, model, sort_by: str, sort_dir: str):
+    return _decode(token, sort_by, sort_dir, lambda v: _load(model.__table__.columns[sort_by], v))
+
+def decode_score_cursor(token: str, score: str):
+    """Cursor of a computed DESC score (e.g. ts_rank), encoded with encode_cursor(score, "desc", ...)."""
+    return _decode(token, score, "desc", float)
+
+def _after(model, col, value, last_id: int, desc: bool):
+    pk = model.id
+    if col is pk:
+        return pk < last_id if desc else pk > last_id
+    nullable = model.__table__.columns[col.key].nullable
+    # Postgres sorts NULLs last for ASC and first for DESC
+    if value is None:
+        if desc:
+            return or_(col.is_not(None), (col.is_(None)) & (pk < last_id))
+        return col.is_(None) & (pk > last_id)
+    if desc:
+        return tuple_(col, pk) < tuple_(value, last_id)
+    cond = tuple_(col, pk) > tuple_(value, last_id)
+    return or_(cond, col.is_(None)) if nullable else cond
+
+def paginate(q, model, sort_by: str, sort_dir: str, limit: int, offset: int = 0, cursor: str | None = None):
+    """Order by (sort_by, id) and apply either keyset (cursor) or offset pagination."""
+    sort_dir = sort_dir.lower()
+    col = sort_column(model, sort_by)
+    desc = sort_dir != "asc"
+
+    if cursor:
+        value, last_id = decode_cursor(cursor, model, sort_by, sort_dir)
+        q = q.where(_after(model, col, value, last_id, desc))
+    elif offset:
+        q = q.offset(offset)
+
+    order = [col] if col is model.id else [col, model.id]
+    q = q.order_by(*[c.desc() if desc else c.asc() for c in order])
+    return q.limit(limit)
+
+def set_next_cursor(response: Response, rows, sort_by: str, sort_dir: str, limit: int):
+    if len(rows) < limit:
+        return
+    last = rows[-1]
+    response.headers[NEXT_CURSOR_HEADER] = encode_cursor(sort_by, sort_dir.lower(), getattr(last, sort_by), last.id)
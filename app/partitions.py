@@ -0,0 +1,58 @@
+import logging
+from datetime import date
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from .config import settings
+from .database import engine
+
+log = logging.getLogger(__name__)
+
+# orders is range-partitioned by month on issue_date (migration 0007):
+# orders_yYYYYmMM partitions plus orders_default for anything outside them
+PARTITIONS_SQL = """
+SELECT c.relname AS name,
+       pg_get_expr(c.relpartbound, c.oid) AS bound,
+       c.reltuples::bigint AS approx_rows,
+       pg_total_relation_size(c.oid) AS total_bytes
+FROM pg_inherits i
+JOIN pg_class c ON c.oid = i.inhrelid
+WHERE i.inhparent = 'orders'::regclass
+ORDER BY c.relname
+"""
+
+def ensure_partitions(conn, from_day: date | None = None, months_ahead: int | None = None) -> int:
+    """Create missing monthly partitions up to `months_ahead` months from now; returns how many."""
+    return conn.execute(text("SELECT orders_ensure_partitions(CAST(:from_day AS date), :ahead)"), {
+        "from_day": from_day or date.today(),
+        "ahead": settings.orders_partitions_ahead if months_ahead is None else months_ahead,
+    }).scalar()
+
+def list_partitions(conn):
+    return conn.execute(text(PARTITIONS_SQL)).mappings().all()
+
+def month_partition(day: date) -> str:
+    return f"orders_y{day.year:04d}m{day.month:02d}"
+
+def detach_partition(conn, name: str, archive_schema: str | None = "archive", drop: bool = False):
+    """Detach one monthly partition and move it to `archive_schema` (or drop it).
+
+    Detached rows leave orders without firing the rollup triggers, so
+    mechanic_daily_revenue keeps the totals of archived months.
+    """
+    conn.execute(text(f'ALTER TABLE orders DETACH PARTITION "{name}"'))
+    if drop:
+        conn.execute(text(f'DROP TABLE "{name}"'))
+    elif archive_schema:
+        conn.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{archive_schema}"'))
+        conn.execute(text(f'ALTER TABLE "{name}" SET SCHEMA "{archive_schema}"'))
+
+def ensure_on_startup():
+    try:
+        with engine.begin() as conn:
+            created = ensure_partitions(conn)
+    except DBAPIError as e:
+        # e.g. migrations not applied yet; orders_default still accepts every row
+        log.warning("could not create orders partitions: %s", e.orig)
+        return
+    if created:
+        log.info("created %d orders partition(s)", created)
@@ -0,0 +1,53 @@
+import time
+from collections import defaultdict
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from .metrics import Counter, Histogram
+
+class PoolMetrics:
+    def __init__(self):
+        self.wait_ms = Histogram()      # time blocked waiting for a free (or new) connection
+        self.checkout_ms = Histogram()  # full checkout, including pre-ping / reconnect
+        self.timeouts = Counter()
+
+# keyed by pool_logging_name, which survives pool.recreate() after engine.dispose()
+pool_metrics: dict[str, PoolMetrics] = defaultdict(PoolMetrics)
+
+class _TimedPoolMixin:
+    def _metrics(self) -> PoolMetrics:
+        return pool_metrics[getattr(self, "logging_name", None) or "default"]
+
+    def _do_get(self):
+        t0 = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self._metrics().timeouts.inc()
+            raise
+        finally:
+            self._metrics().wait_ms.observe((time.perf_counter() - t0) * 1000)
+
+    def connect(self):
+        t0 = time.perf_counter()
+        conn = super().connect()
+        self._metrics().checkout_ms.observe((time.perf_counter() - t0) * 1000)
+        return conn
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+def pool_status(engine) -> dict:
+    pool = engine.pool
+    m = pool_metrics[pool.logging_name]
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "timeouts": m.timeouts.value,
+        "wait_ms": m.wait_ms.snapshot(),
+        "checkout_ms": m.checkout_ms.snapshot(),
+    }
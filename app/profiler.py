@@ -0,0 +1,148 @@
+import re
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from .config import settings
+
+class RequestProfile:
+    __slots__ = ("path", "count", "total_ms", "slowest_ms", "slowest_sql")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_sql = None
+
+    def record(self, statement: str, ms: float):
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.slowest_ms:
+            self.slowest_ms, self.slowest_sql = ms, statement
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.total_ms:.2f};desc="{self.count} queries", db-slowest;dur={self.slowest_ms:.2f}'
+
+_profile: ContextVar[RequestProfile | None] = ContextVar("sql_profile", default=None)
+
+class SlowQueryLog:
+    """Bounded ring buffer of slow statements with their plans, captured on a single
+    background thread so the request itself is not delayed.
+
+    EXPLAIN ANALYZE runs the statement again, so it is only used for plain SELECTs (see
+    _analyzable) and inside a READ ONLY transaction; everything else gets EXPLAIN.
+    """
+
+    def __init__(self, size: int):
+        self.entries = deque(maxlen=size)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="explain")
+
+    def capture(self, statement: str, parameters, ms: float, path: str | None, executemany: bool, engine):
+        entry = {
+            "at": datetime.now(timezone.utc).isoformat(),
+            "path": path,
+            "duration_ms": round(ms, 3),
+            "statement": statement,
+            "parameters": None if executemany else _short(parameters),
+            "plan": None,
+        }
+        self.entries.append(entry)
+        if settings.slow_query_explain and not executemany:
+            self.executor.submit(self._explain, entry, statement, parameters, engine)
+
+    def _explain(self, entry: dict, statement: str, parameters, engine):
+        try:
+            # on the server that ran the statement, e.g. the replica
+            with _sync_engine(engine).connect().execution_options(**{EXPLAINING: True}) as conn:
+                analyze = _analyzable(conn, statement)
+                if analyze:
+                    conn.execute(text("SET TRANSACTION READ ONLY"))
+                explain = "EXPLAIN (ANALYZE, BUFFERS) " if analyze else "EXPLAIN "
+                rows = conn.exec_driver_sql(explain + statement, parameters or {}).all()
+                conn.rollback()
+            entry["plan"] = "\n".join(r[0] for r in rows)
+        except Exception as e:
+            entry["plan"] = f"EXPLAIN failed: {e}"
+
+    def snapshot(self) -> list[dict]:
+        return list(reversed(self.entries))
+
+slow_log = SlowQueryLog(settings.slow_query_log_size)
+
+# execution option of the connection that captures plans; its statements are not logged
+EXPLAINING = "slow_log_explain"
+
+LOCKING_CLAUSE = re.compile(r"\bFOR\s+(NO\s+KEY\s+UPDATE|UPDATE|KEY\s+SHARE|SHARE)\b", re.I)
+CALLED_NAME = re.compile(r"([A-Za-z_][A-Za-z0-9_]*)\s*\(")
+VOLATILE = text("SELECT EXISTS (SELECT FROM pg_proc WHERE provolatile = 'v' AND proname = ANY(:names))")
+
+def _analyzable(conn, statement: str) -> bool:
+    """A plain SELECT: no row locks (e.g. the job claim's FOR UPDATE SKIP LOCKED) and no
+    volatile function calls (e.g. orders_ensure_partitions()), so running it again is harmless."""
+    if statement.lstrip()[:6].upper() != "SELECT" or LOCKING_CLAUSE.search(statement):
+        return False
+    names = {n.lower() for n in CALLED_NAME.findall(statement)}
+    return not (names and conn.scalar(VOLATILE, {"names": list(names)}))
+
+def _sync_engine(engine):
+    """Statements of the async engines are explained on their sync counterparts."""
+    from .database import async_engine, engine as primary, read_async_engine, read_engine
+    return {async_engine.sync_engine: primary, read_async_engine.sync_engine: read_engine}.get(engine, engine)
+
+def _short(parameters, limit: int = 500):
+    text = repr(parameters)
+    return text if len(text) <= limit else text[:limit] + "..."
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append((context, time.perf_counter()))
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    ms = (time.perf_counter() - conn.info["query_start"].pop()[1]) * 1000
+    profile = _profile.get()
+    if profile is not None:
+        profile.record(statement, ms)
+    if ms >= settings.slow_query_ms and not conn.get_execution_options().get(EXPLAINING):
+        slow_log.capture(statement, parameters, ms, profile.path if profile else None, executemany, conn.engine)
+
+def _handle_error(context):
+    # a failed statement never reaches _after_cursor_execute; errors raised later, e.g.
+    # while fetching, find their entry already popped
+    starts = context.connection.info.get("query_start") if context.connection is not None else None
+    if starts and context.execution_context is not None and starts[-1][0] is context.execution_context:
+        starts.pop()
+
+class SQLProfilerMiddleware:
+    """Collects statement count, total DB time and the slowest statement of each request
+    and reports them in a Server-Timing header."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        profile = RequestProfile(scope["path"])
+        token = _profile.set(profile)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", profile.server_timing().encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _profile.reset(token)
+
+def install(app):
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
+    app.add_middleware(SQLProfilerMiddleware)
@@ -0,0 +1,21 @@
+from datetime import date
+from sqlalchemy import text
+
+# Rebuilds mechanic_daily_revenue from orders. Orders are locked in SHARE mode so
+# concurrent writes (and their rollup triggers) wait until the rebuild commits.
+BACKFILL_SQL = [
+    "LOCK TABLE orders IN SHARE MODE",
+    "DELETE FROM mechanic_daily_revenue WHERE day >= :day_from AND day <= :day_to",
+    """
+    INSERT INTO mechanic_daily_revenue (mechanic_id, day, revenue, orders_count)
+    SELECT mechanic_id, issue_date, sum(cost), count(*)
+    FROM orders
+    WHERE issue_date >= :day_from AND issue_date <= :day_to
+    GROUP BY mechanic_id, issue_date
+    """,
+]
+
+def backfill(conn, day_from: date | None = None, day_to: date | None = None):
+    params = {"day_from": day_from or date.min, "day_to": day_to or date.max}
+    for stmt in BACKFILL_SQL:
+        conn.execute(text(stmt), params)
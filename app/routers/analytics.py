@@ -1,166 +1,254 @@
 from datetime import date
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import select, func, and_, cast, Text, update
-from ..deps import get_db
-from ..models import Order, Car, Mechanic
-from ..schemas import OrderOut, OrderDetailsOut, CarOut, MechanicOut
-
-router = APIRouter()
-
-def apply_sort(model, sort_by: str, sort_dir: str):
-    col = getattr(model, sort_by, None)
-    if col is None:
-        raise HTTPException(400, f"Invalid sort_by: {sort_by}")
-    return col.asc() if sort_dir.lower() == "asc" else col.desc()
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import REAL, select, func, cast, tuple_
+from sqlalchemy.exc import DBAPIError
+from ..deps import get_db, get_read_db
+from ..models import Order, Mechanic, MechanicDailyRevenue, Job
+from ..schemas import DashboardOut, JobOut, OrderOut, OrderDetailsOut, OrderSearchOut
+from ..serializers import (
+    ORDER_COLUMNS, ORDER_DETAIL_FIELDS, JOB_COLUMNS, order_columns, order_dict, order_details_dict, order_fields_dict,
+    order_search_dict, job_dict, json_response, parse_fields,
+)
+from ..pagination import NEXT_CURSOR_HEADER, decode_score_cursor, encode_cursor, paginate, set_next_cursor
+from ..filters import META_INPUT_ERRORS, OrderFilter, meta_conditions
+from ..cache import CACHED_TABLES, cached
+from ..etags import conditional
+from ..counts import set_total_count
+from ..config import settings
+from .. import dashboard, dimensions, jobs
+from ..sync_mode import SyncModeRoute, on_event_loop
+
+router = APIRouter(route_class=SyncModeRoute)
 
 @router.get("/orders/filter", response_model=list[OrderOut])
-def filter_orders(
-    db: Session = Depends(get_db),
-    brand: str | None = None,
-    min_cost: float | None = Query(None, ge=0),
-    max_cost: float | None = Query(None, ge=0),
-    grade_gte: int | None = Query(None, ge=1),
-    issue_from: date | None = None,
-    issue_to: date | None = None,
+@conditional()
+@cached()
+async def filter_orders(
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    if_none_match: str | None = Header(None),
+    f: OrderFilter = Depends(),
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
+    cursor: str | None = Query(None, description="X-Next-Cursor value from the previous page"),
     sort_by: str = Query("id"),
     sort_dir: str = Query("asc"),
+    with_count: bool = Query(False, description="Send X-Total-Count, exact or estimated (X-Total-Count-Kind)"),
 ):
-    conditions = []
-
-    q = select(Order).join(Car, Order.car_id == Car.id).join(Mechanic, Order.mechanic_id == Mechanic.id)
-
-    if brand:
-        conditions.append(Car.brand == brand)
-    if min_cost is not None:
-        conditions.append(Order.cost >= min_cost)
-    if max_cost is not None:
-        conditions.append(Order.cost <= max_cost)
-    if grade_gte is not None:
-        conditions.append(Mechanic.grade >= grade_gte)
-    if issue_from:
-        conditions.append(Order.issue_date >= issue_from)
-    if issue_to:
-        conditions.append(Order.issue_date <= issue_to)
-
-    if conditions:
-        q = q.where(and_(*conditions))
-
-    q = q.order_by(apply_sort(Order, sort_by, sort_dir)).limit(limit).offset(offset)
-    rows = db.execute(q).scalars().all()
-
-    return [
-        OrderOut(
-            id=o.id, car_id=o.car_id, mechanic_id=o.mechanic_id,
-            cost=float(o.cost), issue_date=o.issue_date, work_type=o.work_type,
-            planned_end_date=o.planned_end_date, actual_end_date=o.actual_end_date,
-            status=o.status, meta=o.meta
-        )
-        for o in rows
-    ]
+    q = f.apply(select(*ORDER_COLUMNS))
+    if with_count:
+        await set_total_count(response, db, "filter_orders", q, vars(f), CACHED_TABLES)
+    q = paginate(q, Order, sort_by, sort_dir, limit, offset, cursor)
+    rows = (await db.execute(q)).all()
+    set_next_cursor(response, rows, sort_by, sort_dir, limit)
+    return json_response([order_dict(r) for r in rows], response)
 
 @router.get("/orders/with-details", response_model=list[OrderDetailsOut])
-def orders_with_details(
-    db: Session = Depends(get_db),
+@conditional()
+@cached()
+async def orders_with_details(
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    if_none_match: str | None = Header(None),
     issue_from: date | None = None,
     issue_to: date | None = None,
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
+    cursor: str | None = Query(None, description="X-Next-Cursor value from the previous page"),
     sort_by: str = Query("id"),
     sort_dir: str = Query("asc"),
+    fields: str | None = Query(None, description="Comma-separated fields to return, e.g. status,cost,car (id is always included)"),
 ):
-    q = (
-        select(Order)
-        .options(joinedload(Order.car), joinedload(Order.mechanic))
-    )
+    names = parse_fields(fields, ORDER_DETAIL_FIELDS)
+    # order columns only; cars and mechanics are attached from the dimension cache
+    if names is None:
+        columns = ORDER_COLUMNS
+    else:
+        keys = [k for n, k in (("car", "car_id"), ("mechanic", "mechanic_id")) if n in names]
+        columns = order_columns(names, sort_by, *keys)
+    q = select(*columns)
     if issue_from:
         q = q.where(Order.issue_date >= issue_from)
     if issue_to:
         q = q.where(Order.issue_date <= issue_to)
 
-    q = q.order_by(apply_sort(Order, sort_by, sort_dir)).limit(limit).offset(offset)
-    rows = db.execute(q).scalars().all()
-
-    result = []
-    for o in rows:
-        result.append(
-            OrderDetailsOut(
-                id=o.id,
-                cost=float(o.cost),
-                issue_date=o.issue_date,
-                work_type=o.work_type,
-                planned_end_date=o.planned_end_date,
-                actual_end_date=o.actual_end_date,
-                status=o.status,
-                meta=o.meta,
-                car=CarOut(id=o.car.id, number=o.car.number, brand=o.car.brand, year=o.car.year, owner_name=o.car.owner_name),
-                mechanic=MechanicOut(id=o.mechanic.id, employee_no=o.mechanic.employee_no, full_name=o.mechanic.full_name, experience_years=o.mechanic.experience_years, grade=o.mechanic.grade)
-            )
-        )
-    return result
-
-@router.post("/orders/close-overdue", response_model=dict)
-def close_overdue_orders(db: Session = Depends(get_db)):
-    stmt = (
-        update(Order)
-        .where(and_(Order.actual_end_date.is_not(None), Order.actual_end_date > Order.planned_end_date))
-        .values(status="done")
-    )
-    res = db.execute(stmt)
-    db.commit()
-    return {"updated": res.rowcount}
+    q = paginate(q, Order, sort_by, sort_dir, limit, offset, cursor)
+    rows = (await db.execute(q)).all()
+    set_next_cursor(response, rows, sort_by, sort_dir, limit)
+    cars = await dimensions.cars(db, {r.car_id for r in rows}) if names is None or "car" in names else None
+    mechanics = await dimensions.mechanics(db, {r.mechanic_id for r in rows}) if names is None or "mechanic" in names else None
+    # a car or mechanic deleted after the orders were read takes its orders with it (ON DELETE CASCADE)
+    rows = [
+        r for r in rows
+        if (cars is None or cars.get(r.car_id)) and (mechanics is None or mechanics.get(r.mechanic_id))
+    ]
+    if names is None:
+        return json_response([order_details_dict(r, cars[r.car_id], mechanics[r.mechanic_id]) for r in rows], response)
+
+    order_names = [n for n in names if n not in ("car", "mechanic")]
+    items = [order_fields_dict(r, order_names) for r in rows]
+    if cars is not None:
+        for item, r in zip(items, rows):
+            item["car"] = cars[r.car_id]
+    if mechanics is not None:
+        for item, r in zip(items, rows):
+            item["mechanic"] = mechanics[r.mechanic_id]
+    return json_response(items, response)
+
+@router.post("/orders/close-overdue", response_model=JobOut, status_code=202)
+# the job runs as a task on the server's event loop
+@on_event_loop
+async def close_overdue_orders(
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    batch_size: int = Query(settings.close_overdue_batch_size, ge=1, le=10000),
+):
+    # runs in the background in batches; poll the returned job for progress
+    job = await jobs.enqueue(db, "close_overdue", {"batch_size": batch_size})
+    response.headers["Location"] = f"/analytics/jobs/{job.id}"
+    return json_response(job_dict(job), response, status_code=202)
+
+@router.get("/jobs/{job_id}", response_model=JobOut)
+async def get_job(job_id: int, db: AsyncSession = Depends(get_db)):
+    row = (await db.execute(select(*JOB_COLUMNS).where(Job.id == job_id))).first()
+    if not row:
+        raise HTTPException(404, "Job not found")
+    return json_response(job_dict(row))
 
 @router.get("/revenue/by-mechanic", response_model=list[dict])
-def revenue_by_mechanic(
-    db: Session = Depends(get_db),
+@conditional(("orders", "mechanics"))
+@cached(("orders", "mechanics"))
+async def revenue_by_mechanic(
+    db: AsyncSession = Depends(get_read_db),
+    if_none_match: str | None = Header(None),
     issue_from: date | None = None,
     issue_to: date | None = None,
     limit: int = Query(100, ge=1, le=500),
     offset: int = Query(0, ge=0),
     sort_dir: str = Query("desc"),
 ):
+    # sums the daily rollup buckets instead of scanning orders
+    R = MechanicDailyRevenue
+    revenue = func.sum(R.revenue)
     q = (
         select(
             Mechanic.id.label("mechanic_id"),
             Mechanic.full_name.label("full_name"),
-            func.sum(Order.cost).label("revenue"),
-            func.count(Order.id).label("orders_count"),
+            revenue.label("revenue"),
+            func.sum(R.orders_count).label("orders_count"),
         )
-        .join(Order, Order.mechanic_id == Mechanic.id)
+        .join(R, R.mechanic_id == Mechanic.id)
         .group_by(Mechanic.id, Mechanic.full_name)
+        .having(func.sum(R.orders_count) > 0)
     )
     if issue_from:
-        q = q.where(Order.issue_date >= issue_from)
+        q = q.where(R.day >= issue_from)
     if issue_to:
-        q = q.where(Order.issue_date <= issue_to)
+        q = q.where(R.day <= issue_to)
 
-    q = q.order_by(func.sum(Order.cost).asc() if sort_dir == "asc" else func.sum(Order.cost).desc())
+    q = q.order_by(revenue.asc() if sort_dir == "asc" else revenue.desc())
     q = q.limit(limit).offset(offset)
 
-    rows = db.execute(q).all()
-    return [
+    rows = (await db.execute(q)).all()
+    return json_response([
         {"mechanic_id": r.mechanic_id, "full_name": r.full_name, "revenue": float(r.revenue or 0), "orders_count": int(r.orders_count)}
         for r in rows
-    ]
+    ])
 
 @router.get("/orders/search-meta", response_model=list[OrderOut])
-def search_orders_in_meta(
-    pattern: str = Query(..., description="psql regex for ~ operator"),
-    db: Session = Depends(get_db),
+@conditional(("orders",))
+@cached(("orders",))
+async def search_orders_in_meta(
+    response: Response,
+    pattern: str | None = Query(None, description="psql regex for ~ operator over meta::text"),
+    meta_contains: str | None = Query(None, description='JSON document for @>, e.g. {"parts":[{"name":"pads"}]}'),
+    jsonpath: str | None = Query(None, description="jsonpath for @?, e.g. $.parts[*] ? (@.qty > 2)"),
+    db: AsyncSession = Depends(get_read_db),
+    if_none_match: str | None = Header(None),
+    issue_from: date | None = None,
+    issue_to: date | None = None,
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
+    cursor: str | None = Query(None, description="X-Next-Cursor value from the previous page"),
 ):
-    cond = cast(Order.meta, Text).op("~")(pattern)
-    q = select(Order).where(cond).order_by(Order.id.asc()).limit(limit).offset(offset)
-    rows = db.execute(q).scalars().all()
-    return [
-        OrderOut(
-            id=o.id, car_id=o.car_id, mechanic_id=o.mechanic_id,
-            cost=float(o.cost), issue_date=o.issue_date, work_type=o.work_type,
-            planned_end_date=o.planned_end_date, actual_end_date=o.actual_end_date,
-            status=o.status, meta=o.meta
-        )
-        for o in rows
-    ]
+    q = select(*ORDER_COLUMNS).where(*meta_conditions(pattern, meta_contains, jsonpath))
+    # a date range prunes the scan to the matching monthly partitions
+    if issue_from:
+        q = q.where(Order.issue_date >= issue_from)
+    if issue_to:
+        q = q.where(Order.issue_date <= issue_to)
+    q = paginate(q, Order, "id", "asc", limit, offset, cursor)
+    try:
+        rows = (await db.execute(q)).all()
+    except DBAPIError as e:
+        detail = META_INPUT_ERRORS.get(getattr(e.orig, "sqlstate", None))
+        if detail:
+            raise HTTPException(400, f"{detail}: {str(e.orig).splitlines()[0]}")
+        raise
+    set_next_cursor(response, rows, "id", "asc", limit)
+    return json_response([order_dict(r) for r in rows], response)
+
+# both configurations, matching the russian + english orders.search_tsv document
+def _tsquery(text_query: str):
+    return func.websearch_to_tsquery("russian", text_query).op("||")(func.websearch_to_tsquery("english", text_query))
+
+HEADLINE_OPTIONS = "StartSel=<b>, StopSel=</b>, MaxWords=20, MinWords=5, MaxFragments=2"
+
+@router.get("/orders/search", response_model=list[OrderSearchOut])
+@conditional(("orders",))
+@cached(("orders",))
+async def search_orders(
+    response: Response,
+    q: str = Query(..., min_length=1, description='web-search syntax: стук подвеска, "client note", urgent -oil'),
+    db: AsyncSession = Depends(get_read_db),
+    if_none_match: str | None = Header(None),
+    issue_from: date | None = None,
+    issue_to: date | None = None,
+    limit: int = Query(20, ge=1, le=200),
+    cursor: str | None = Query(None, description="X-Next-Cursor value from the previous page"),
+):
+    tsq = _tsquery(q)
+    rank = func.ts_rank(Order.search_tsv, tsq)
+    document = func.concat_ws(" · ", Order.work_type, Order.meta["symptoms"].astext, Order.meta["comment"].astext)
+    stmt = (
+        select(*ORDER_COLUMNS, rank.label("rank"), func.ts_headline("russian", document, tsq, HEADLINE_OPTIONS).label("headline"))
+        .where(Order.search_tsv.op("@@")(tsq))
+    )
+    if issue_from:
+        stmt = stmt.where(Order.issue_date >= issue_from)
+    if issue_to:
+        stmt = stmt.where(Order.issue_date <= issue_to)
+    if cursor:
+        last_rank, last_id = decode_score_cursor(cursor, "rank")
+        # ts_rank is real; compare in real so the cursor value round-trips exactly
+        stmt = stmt.where(tuple_(rank, Order.id) < tuple_(cast(last_rank, REAL), last_id))
+    # ts_headline is only evaluated for the rows that survive ORDER BY ... LIMIT
+    stmt = stmt.order_by(rank.desc(), Order.id.desc()).limit(limit)
+
+    rows = (await db.execute(stmt)).all()
+    if len(rows) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor("rank", "desc", rows[-1].rank, rows[-1].id)
+    return json_response([order_search_dict(r) for r in rows], response)
+
+@router.get("/dashboard", response_model=DashboardOut)
+# panels run concurrently on the event loop, each on its own session
+@on_event_loop
+@conditional(("orders", "mechanics"))
+@cached(("orders", "mechanics"))
+async def get_dashboard(
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    if_none_match: str | None = Header(None),
+    issue_from: date | None = None,
+    issue_to: date | None = None,
+    panels: str | None = Query(None, description=f"Comma-separated subset of: {', '.join(dashboard.PANELS)}"),
+    timeout_ms: int = Query(settings.dashboard_timeout_ms, ge=1, le=60000, description="Per-panel timeout"),
+):
+    # every panel runs concurrently on its own session; `db` only decides replica vs primary
+    result = await dashboard.dashboard(
+        dashboard.parse_panels(panels), db.info.get("replica", False), timeout_ms, issue_from=issue_from, issue_to=issue_to,
+    )
+    if result["partial"]:
+        response.headers["Cache-Control"] = "no-store"
+    return json_response(result, response)
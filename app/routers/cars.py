@@ -1,63 +1,88 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import select
-from ..deps import get_db
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import insert, select, update
+from ..deps import get_db, get_read_db
 from ..models import Car
+from ..schemas import CarCreate, CarUpdate, CarOut, CarBulkUpdate, BulkResult
+from ..bulk import check_bulk_size, unique_errors, bulk_insert, bulk_update, bulk_delete
+from ..counts import set_total_count
+from ..etags import check_if_match, conditional, none_match, not_modified, raise_unmatched, row_etag, row_version, version_matches
+from ..pagination import paginate, set_next_cursor
+from ..serializers import CAR_COLUMNS, car_dict, json_response
+from ..writes import write_returning
+from ..sync_mode import SyncModeRoute
 
-router = APIRouter()
+router = APIRouter(route_class=SyncModeRoute)
 
-@router.post("", response_model=dict)
-def create_car(payload: dict, db: Session = Depends(get_db)):
-    car = Car(**payload)
-    db.add(car)
-    db.commit()
-    db.refresh(car)
-    return {"id": car.id}
+@router.post("", response_model=CarOut)
+async def create_car(payload: CarCreate, db: AsyncSession = Depends(get_db)):
+    car = await write_returning(db, insert(Car).values(**payload.model_dump()).returning(*CAR_COLUMNS))
+    return json_response(car_dict(car))
+
+@router.post("/bulk", response_model=BulkResult)
+async def create_cars_bulk(payload: list[CarCreate], db: AsyncSession = Depends(get_db)):
+    check_bulk_size(payload)
+    errors = await unique_errors(db, Car, "number", payload)
+    return await bulk_insert(db, Car, payload, errors)
+
+@router.put("/bulk", response_model=BulkResult)
+async def update_cars_bulk(payload: list[CarBulkUpdate], db: AsyncSession = Depends(get_db)):
+    check_bulk_size(payload)
+    errors = await unique_errors(db, Car, "number", payload)
+    return await bulk_update(db, Car, payload, errors)
+
+@router.delete("/bulk", response_model=BulkResult)
+async def delete_cars_bulk(ids: list[int] = Body(...), db: AsyncSession = Depends(get_db)):
+    return await bulk_delete(db, Car, ids)
 
 @router.get("", response_model=list[dict])
-def list_cars(
-    db: Session = Depends(get_db),
+@conditional(("cars",))
+async def list_cars(
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    if_none_match: str | None = Header(None),
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
+    cursor: str | None = Query(None, description="X-Next-Cursor value from the previous page"),
     sort_by: str = Query("id"),
     sort_dir: str = Query("asc"),
+    with_count: bool = Query(False, description="Send X-Total-Count, exact or estimated (X-Total-Count-Kind)"),
 ):
-    sort_col = getattr(Car, sort_by, None)
-    if sort_col is None:
-        raise HTTPException(400, "Invalid sort_by")
-
-    q = select(Car)
-    q = q.order_by(sort_col.asc() if sort_dir == "asc" else sort_col.desc())
-    q = q.limit(limit).offset(offset)
-
-    rows = db.execute(q).scalars().all()
-    return [
-        {"id": c.id, "number": c.number, "brand": c.brand, "year": c.year, "owner_name": c.owner_name}
-        for c in rows
-    ]
+    if with_count:
+        await set_total_count(response, db, "list_cars", select(Car.id), {}, ("cars",), table="cars")
+    q = paginate(select(*CAR_COLUMNS), Car, sort_by, sort_dir, limit, offset, cursor)
+    rows = (await db.execute(q)).all()
+    set_next_cursor(response, rows, sort_by, sort_dir, limit)
+    return json_response([car_dict(r) for r in rows], response)
 
 @router.get("/{car_id}", response_model=dict)
-def get_car(car_id: int, db: Session = Depends(get_db)):
-    car = db.get(Car, car_id)
+async def get_car(car_id: int, db: AsyncSession = Depends(get_read_db), if_none_match: str | None = Header(None)):
+    car = (await db.execute(select(*CAR_COLUMNS, row_version(Car)).where(Car.id == car_id))).first()
     if not car:
         raise HTTPException(404, "Car not found")
-    return {"id": car.id, "number": car.number, "brand": car.brand, "year": car.year, "owner_name": car.owner_name}
+    etag = row_etag(car.version)
+    if none_match(if_none_match, etag):
+        return not_modified(etag)
+    return json_response(car_dict(car), headers={"ETag": etag})
 
 @router.put("/{car_id}", response_model=dict)
-def update_car(car_id: int, payload: dict, db: Session = Depends(get_db)):
-    car = db.get(Car, car_id)
+async def update_car(car_id: int, payload: CarUpdate, db: AsyncSession = Depends(get_db), if_match: str | None = Header(None)):
+    data = payload.model_dump(exclude_unset=True)
+    q = select(row_version(Car)) if not data else update(Car).values(**data).returning(row_version(Car))
+    q = q.where(Car.id == car_id)
+    if if_match is not None:
+        q = q.where(version_matches(Car, if_match))
+    car = await write_returning(db, q)
     if not car:
-        raise HTTPException(404, "Car not found")
-    for k, v in payload.items():
-        setattr(car, k, v)
-    db.commit()
-    return {"status": "ok"}
+        await raise_unmatched(db, Car, car_id, if_match, "Car not found")
+    return json_response({"status": "ok"}, headers={"ETag": row_etag(car.version)})
 
 @router.delete("/{car_id}", response_model=dict)
-def delete_car(car_id: int, db: Session = Depends(get_db)):
-    car = db.get(Car, car_id)
+async def delete_car(car_id: int, db: AsyncSession = Depends(get_db), if_match: str | None = Header(None)):
+    await check_if_match(db, Car, car_id, if_match, "Car not found")
+    car = await db.get(Car, car_id)
     if not car:
         raise HTTPException(404, "Car not found")
-    db.delete(car)
-    db.commit()
+    await db.delete(car)
+    await db.commit()
     return {"status": "ok"}
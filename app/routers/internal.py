@@ -0,0 +1,35 @@
+from fastapi import APIRouter
+from ..cache import cache_info
+from ..config import settings
+from ..dimensions import dimension_info
+from ..database import engine, async_engine, read_engine, read_async_engine
+from ..pool import pool_status
+from ..profiler import slow_log
+from ..sync_mode import SyncModeRoute
+
+router = APIRouter(route_class=SyncModeRoute)
+
+@router.get("/cache", response_model=dict)
+async def cache_stats():
+    return {**await cache_info(), "dimensions": dimension_info()}
+
+@router.get("/pool", response_model=dict)
+async def pool_stats():
+    return {
+        "db_mode": settings.db_mode,
+        "settings": {
+            "pool_size": settings.db_pool_size,
+            "max_overflow": settings.db_max_overflow,
+            "pool_timeout_s": settings.db_pool_timeout_s,
+            "pool_recycle_s": settings.db_pool_recycle_s,
+            "pool_pre_ping": settings.db_pool_pre_ping,
+            "statement_timeout_ms": settings.db_statement_timeout_ms,
+        },
+        "pools": {"sync": pool_status(engine), "async": pool_status(async_engine)},
+        "read_pools": {"sync": pool_status(read_engine), "async": pool_status(read_async_engine)}
+        if settings.database_read_url else None,
+    }
+
+@router.get("/slow-queries", response_model=list[dict])
+async def slow_queries():
+    return slow_log.snapshot()
@@ -1,62 +1,109 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import select
-from ..deps import get_db
-from ..models import Mechanic
-from ..schemas import MechanicCreate, MechanicUpdate, MechanicOut
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import insert, select, update
+from ..deps import get_db, get_read_db
+from ..models import Mechanic, Order
+from ..schemas import MechanicCreate, MechanicUpdate, MechanicOut, MechanicBulkUpdate, BulkResult
+from ..bulk import check_bulk_size, unique_errors, bulk_insert, bulk_update, bulk_delete
+from ..counts import set_total_count
+from ..etags import check_if_match, conditional, none_match, not_modified, raise_unmatched, row_etag, row_version, version_matches
+from ..filters import Period
+from ..pagination import paginate, set_next_cursor
+from ..serializers import MECHANIC_COLUMNS, mechanic_dict, json_response
+from ..writes import write_returning
+from ..sync_mode import SyncModeRoute
 
-router = APIRouter()
-
-def apply_sort(model, sort_by: str, sort_dir: str):
-    col = getattr(model, sort_by, None)
-    if col is None:
-        raise HTTPException(400, f"Invalid sort_by: {sort_by}")
-    return col.asc() if sort_dir.lower() == "asc" else col.desc()
+router = APIRouter(route_class=SyncModeRoute)
 
 @router.post("", response_model=MechanicOut)
-def create_mechanic(payload: MechanicCreate, db: Session = Depends(get_db)):
-    m = Mechanic(**payload.model_dump())
-    db.add(m)
-    db.commit()
-    db.refresh(m)
-    return MechanicOut(id=m.id, employee_no=m.employee_no, full_name=m.full_name, experience_years=m.experience_years, grade=m.grade)
+async def create_mechanic(payload: MechanicCreate, db: AsyncSession = Depends(get_db)):
+    m = await write_returning(db, insert(Mechanic).values(**payload.model_dump()).returning(*MECHANIC_COLUMNS))
+    return json_response(mechanic_dict(m))
+
+@router.post("/bulk", response_model=BulkResult)
+async def create_mechanics_bulk(payload: list[MechanicCreate], db: AsyncSession = Depends(get_db)):
+    check_bulk_size(payload)
+    errors = await unique_errors(db, Mechanic, "employee_no", payload)
+    return await bulk_insert(db, Mechanic, payload, errors)
+
+@router.put("/bulk", response_model=BulkResult)
+async def update_mechanics_bulk(payload: list[MechanicBulkUpdate], db: AsyncSession = Depends(get_db)):
+    check_bulk_size(payload)
+    errors = await unique_errors(db, Mechanic, "employee_no", payload)
+    return await bulk_update(db, Mechanic, payload, errors)
+
+@router.delete("/bulk", response_model=BulkResult)
+async def delete_mechanics_bulk(ids: list[int] = Body(...), db: AsyncSession = Depends(get_db)):
+    return await bulk_delete(db, Mechanic, ids)
 
 @router.get("", response_model=list[MechanicOut])
-def list_mechanics(
-    db: Session = Depends(get_db),
+@conditional(("mechanics",))
+async def list_mechanics(
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    if_none_match: str | None = Header(None),
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
+    cursor: str | None = Query(None, description="X-Next-Cursor value from the previous page"),
     sort_by: str = Query("id"),
     sort_dir: str = Query("asc"),
+    with_count: bool = Query(False, description="Send X-Total-Count, exact or estimated (X-Total-Count-Kind)"),
 ):
-    q = select(Mechanic).order_by(apply_sort(Mechanic, sort_by, sort_dir)).limit(limit).offset(offset)
-    rows = db.execute(q).scalars().all()
-    return [MechanicOut(id=x.id, employee_no=x.employee_no, full_name=x.full_name, experience_years=x.experience_years, grade=x.grade) for x in rows]
+    if with_count:
+        await set_total_count(response, db, "list_mechanics", select(Mechanic.id), {}, ("mechanics",), table="mechanics")
+    q = paginate(select(*MECHANIC_COLUMNS), Mechanic, sort_by, sort_dir, limit, offset, cursor)
+    rows = (await db.execute(q)).all()
+    set_next_cursor(response, rows, sort_by, sort_dir, limit)
+    return json_response([mechanic_dict(r) for r in rows], response)
+
+@router.get("/available", response_model=list[MechanicOut])
+@conditional(("orders", "mechanics"))
+async def available_mechanics(
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    if_none_match: str | None = Header(None),
+    period: Period = Depends(),
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    cursor: str | None = Query(None, description="X-Next-Cursor value from the previous page"),
+    sort_by: str = Query("id"),
+    sort_dir: str = Query("asc"),
+):
+    """Mechanics with no order overlapping date_from..date_to."""
+    busy = select(Order.id).where(Order.mechanic_id == Mechanic.id, period.overlaps())
+    q = paginate(select(*MECHANIC_COLUMNS).where(~busy.exists()), Mechanic, sort_by, sort_dir, limit, offset, cursor)
+    rows = (await db.execute(q)).all()
+    set_next_cursor(response, rows, sort_by, sort_dir, limit)
+    return json_response([mechanic_dict(r) for r in rows], response)
 
 @router.get("/{mechanic_id}", response_model=MechanicOut)
-def get_mechanic(mechanic_id: int, db: Session = Depends(get_db)):
-    m = db.get(Mechanic, mechanic_id)
+async def get_mechanic(mechanic_id: int, db: AsyncSession = Depends(get_read_db), if_none_match: str | None = Header(None)):
+    m = (await db.execute(select(*MECHANIC_COLUMNS, row_version(Mechanic)).where(Mechanic.id == mechanic_id))).first()
     if not m:
         raise HTTPException(404, "Mechanic not found")
-    return MechanicOut(id=m.id, employee_no=m.employee_no, full_name=m.full_name, experience_years=m.experience_years, grade=m.grade)
+    etag = row_etag(m.version)
+    if none_match(if_none_match, etag):
+        return not_modified(etag)
+    return json_response(mechanic_dict(m), headers={"ETag": etag})
 
 @router.put("/{mechanic_id}", response_model=MechanicOut)
-def update_mechanic(mechanic_id: int, payload: MechanicUpdate, db: Session = Depends(get_db)):
-    m = db.get(Mechanic, mechanic_id)
-    if not m:
-        raise HTTPException(404, "Mechanic not found")
+async def update_mechanic(mechanic_id: int, payload: MechanicUpdate, db: AsyncSession = Depends(get_db), if_match: str | None = Header(None)):
     data = payload.model_dump(exclude_unset=True)
-    for k, v in data.items():
-        setattr(m, k, v)
-    db.commit()
-    db.refresh(m)
-    return MechanicOut(id=m.id, employee_no=m.employee_no, full_name=m.full_name, experience_years=m.experience_years, grade=m.grade)
+    q = select(*MECHANIC_COLUMNS, row_version(Mechanic)) if not data else update(Mechanic).values(**data).returning(*MECHANIC_COLUMNS, row_version(Mechanic))
+    q = q.where(Mechanic.id == mechanic_id)
+    if if_match is not None:
+        q = q.where(version_matches(Mechanic, if_match))
+    m = await write_returning(db, q)
+    if not m:
+        await raise_unmatched(db, Mechanic, mechanic_id, if_match, "Mechanic not found")
+    return json_response(mechanic_dict(m), headers={"ETag": row_etag(m.version)})
 
 @router.delete("/{mechanic_id}", response_model=dict)
-def delete_mechanic(mechanic_id: int, db: Session = Depends(get_db)):
-    m = db.get(Mechanic, mechanic_id)
+async def delete_mechanic(mechanic_id: int, db: AsyncSession = Depends(get_db), if_match: str | None = Header(None)):
+    await check_if_match(db, Mechanic, mechanic_id, if_match, "Mechanic not found")
+    m = await db.get(Mechanic, mechanic_id)
     if not m:
         raise HTTPException(404, "Mechanic not found")
-    db.delete(m)
-    db.commit()
+    await db.delete(m)
+    await db.commit()
     return {"status": "ok"}
@@ -1,102 +1,167 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import select
-from ..deps import get_db
+from typing import Literal
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import insert, select, update, literal, tuple_, union_all
+from ..deps import get_db, get_read_db, use_replica
 from ..models import Order, Car, Mechanic
-from ..schemas import OrderCreate, OrderUpdate, OrderOut
+from ..schemas import OrderCreate, OrderUpdate, OrderOut, OrderBulkUpdate, OrderChanges, BulkResult
+from ..changes import order_changes
+from ..bulk import check_bulk_size, bulk_insert, bulk_update, bulk_delete
+from ..counts import set_total_count
+from ..etags import check_if_match, conditional, none_match, not_modified, raise_unmatched, row_etag, row_version, version_matches
+from ..pagination import paginate, set_next_cursor
+from ..filters import OrderFilter, Period
+from ..export import MEDIA_TYPES, stream_orders
+from ..serializers import ORDER_COLUMNS, ORDER_FIELDS, order_columns, order_dict, order_fields_dict, parse_fields, json_response
+from ..writes import write_returning
+from ..sync_mode import SyncModeRoute
 
-router = APIRouter()
+router = APIRouter(route_class=SyncModeRoute)
 
-def apply_sort(model, sort_by: str, sort_dir: str):
-    col = getattr(model, sort_by, None)
-    if col is None:
-        raise HTTPException(400, f"Invalid sort_by: {sort_by}")
-    return col.asc() if sort_dir.lower() == "asc" else col.desc()
+async def fk_errors(db: AsyncSession, items) -> dict[int, str]:
+    """Check every car_id / mechanic_id of a batch with a single query."""
+    car_ids = {p.car_id for p in items if p.car_id is not None}
+    mechanic_ids = {p.mechanic_id for p in items if p.mechanic_id is not None}
+    q = union_all(
+        select(literal("car"), Car.id).where(Car.id.in_(car_ids)),
+        select(literal("mechanic"), Mechanic.id).where(Mechanic.id.in_(mechanic_ids)),
+    )
+    found = {(kind, id_) for kind, id_ in (await db.execute(q)).all()}
 
-@router.post("", response_model=OrderOut)
-def create_order(payload: OrderCreate, db: Session = Depends(get_db)):
-    if not db.get(Car, payload.car_id):
-        raise HTTPException(400, "car_id does not exist")
-    if not db.get(Mechanic, payload.mechanic_id):
-        raise HTTPException(400, "mechanic_id does not exist")
+    errors = {}
+    for i, p in enumerate(items):
+        if p.car_id is not None and ("car", p.car_id) not in found:
+            errors[i] = "car_id does not exist"
+        elif p.mechanic_id is not None and ("mechanic", p.mechanic_id) not in found:
+            errors[i] = "mechanic_id does not exist"
+    return errors
 
+@router.post("", response_model=OrderOut)
+async def create_order(payload: OrderCreate, db: AsyncSession = Depends(get_db)):
     data = payload.model_dump()
     if data.get("status") is None:
         data["status"] = "new"
-    o = Order(**data)
-    db.add(o)
-    db.commit()
-    db.refresh(o)
-    return OrderOut(
-        id=o.id, car_id=o.car_id, mechanic_id=o.mechanic_id,
-        cost=float(o.cost), issue_date=o.issue_date, work_type=o.work_type,
-        planned_end_date=o.planned_end_date, actual_end_date=o.actual_end_date,
-        status=o.status, meta=o.meta
-    )
+    o = await write_returning(db, insert(Order).values(**data).returning(*ORDER_COLUMNS))
+    return json_response(order_dict(o))
+
+@router.post("/bulk", response_model=BulkResult)
+async def create_orders_bulk(payload: list[OrderCreate], db: AsyncSession = Depends(get_db)):
+    check_bulk_size(payload)
+    errors = await fk_errors(db, payload)
+    return await bulk_insert(db, Order, payload, errors, defaults={"status": "new"})
+
+@router.put("/bulk", response_model=BulkResult)
+async def update_orders_bulk(payload: list[OrderBulkUpdate], db: AsyncSession = Depends(get_db)):
+    check_bulk_size(payload)
+    errors = await fk_errors(db, payload)
+    return await bulk_update(db, Order, payload, errors)
+
+@router.delete("/bulk", response_model=BulkResult)
+async def delete_orders_bulk(ids: list[int] = Body(...), db: AsyncSession = Depends(get_db)):
+    return await bulk_delete(db, Order, ids)
 
 @router.get("", response_model=list[OrderOut])
-def list_orders(
-    db: Session = Depends(get_db),
+@conditional(("orders",))
+async def list_orders(
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    if_none_match: str | None = Header(None),
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
+    cursor: str | None = Query(None, description="X-Next-Cursor value from the previous page"),
     sort_by: str = Query("id"),
     sort_dir: str = Query("asc"),
+    with_count: bool = Query(False, description="Send X-Total-Count, exact or estimated (X-Total-Count-Kind)"),
+    fields: str | None = Query(None, description="Comma-separated fields to return, e.g. status,cost (id is always included)"),
 ):
-    q = select(Order).order_by(apply_sort(Order, sort_by, sort_dir)).limit(limit).offset(offset)
-    rows = db.execute(q).scalars().all()
-    return [
-        OrderOut(
-            id=o.id, car_id=o.car_id, mechanic_id=o.mechanic_id,
-            cost=float(o.cost), issue_date=o.issue_date, work_type=o.work_type,
-            planned_end_date=o.planned_end_date, actual_end_date=o.actual_end_date,
-            status=o.status, meta=o.meta
-        )
-        for o in rows
-    ]
+    names = parse_fields(fields, ORDER_FIELDS)
+    if with_count:
+        await set_total_count(response, db, "list_orders", select(Order.id), {}, ("orders",), table="orders")
+    # only the requested columns are selected, plus the sort key for the cursor
+    columns = ORDER_COLUMNS if names is None else order_columns(names, sort_by)
+    q = paginate(select(*columns), Order, sort_by, sort_dir, limit, offset, cursor)
+    rows = (await db.execute(q)).all()
+    set_next_cursor(response, rows, sort_by, sort_dir, limit)
+    if names is None:
+        return json_response([order_dict(r) for r in rows], response)
+    return json_response([order_fields_dict(r, names) for r in rows], response)
+
+@router.get("/export")
+async def export_orders(
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    f: OrderFilter = Depends(),
+    replica: bool = Depends(use_replica),
+):
+    q = f.apply(select(*ORDER_COLUMNS)).order_by(Order.id)
+    headers = {"Content-Disposition": f'attachment; filename="orders.{format}"'}
+    return StreamingResponse(stream_orders(q, format, replica), media_type=MEDIA_TYPES[format], headers=headers)
+
+@router.get("/overlapping", response_model=list[OrderOut])
+@conditional(("orders",))
+async def overlapping_orders(
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    if_none_match: str | None = Header(None),
+    period: Period = Depends(),
+    mechanic_id: int | None = None,
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    cursor: str | None = Query(None, description="X-Next-Cursor value from the previous page"),
+    sort_by: str = Query("id"),
+    sort_dir: str = Query("asc"),
+):
+    """Orders whose work period overlaps date_from..date_to, optionally of one mechanic."""
+    matching = select(Order.id, Order.issue_date).where(period.overlaps())
+    if mechanic_id is not None:
+        matching = matching.where(Order.mechanic_id == mechanic_id)
+    # keys come from the work_period GiST index first; sorting the bare filter by id lets
+    # the planner walk every partition's pkey looking for matches
+    matching = matching.cte("matching").prefix_with("MATERIALIZED")
+    q = select(*ORDER_COLUMNS).where(tuple_(Order.id, Order.issue_date).in_(select(matching.c.id, matching.c.issue_date)))
+    q = paginate(q, Order, sort_by, sort_dir, limit, offset, cursor)
+    rows = (await db.execute(q)).all()
+    set_next_cursor(response, rows, sort_by, sort_dir, limit)
+    return json_response([order_dict(r) for r in rows], response)
+
+@router.get("/changes", response_model=OrderChanges)
+async def order_changes_feed(
+    db: AsyncSession = Depends(get_read_db),
+    since: str | None = Query(None, description="next_since from the previous call; omit for a full sync"),
+    limit: int = Query(500, ge=1, le=5000),
+):
+    """Orders created, updated or deleted after `since`, in commit-safe sequence order."""
+    return json_response(await order_changes(db, since, limit))
 
 @router.get("/{order_id}", response_model=OrderOut)
-def get_order(order_id: int, db: Session = Depends(get_db)):
-    o = db.get(Order, order_id)
+async def get_order(order_id: int, db: AsyncSession = Depends(get_read_db), if_none_match: str | None = Header(None)):
+    o = (await db.execute(select(*ORDER_COLUMNS, row_version(Order)).where(Order.id == order_id))).first()
     if not o:
         raise HTTPException(404, "Order not found")
-    return OrderOut(
-        id=o.id, car_id=o.car_id, mechanic_id=o.mechanic_id,
-        cost=float(o.cost), issue_date=o.issue_date, work_type=o.work_type,
-        planned_end_date=o.planned_end_date, actual_end_date=o.actual_end_date,
-        status=o.status, meta=o.meta
-    )
+    etag = row_etag(o.version)
+    if none_match(if_none_match, etag):
+        return not_modified(etag)
+    return json_response(order_dict(o), headers={"ETag": etag})
 
 @router.put("/{order_id}", response_model=OrderOut)
-def update_order(order_id: int, payload: OrderUpdate, db: Session = Depends(get_db)):
-    o = db.get(Order, order_id)
-    if not o:
-        raise HTTPException(404, "Order not found")
-
+async def update_order(order_id: int, payload: OrderUpdate, db: AsyncSession = Depends(get_db), if_match: str | None = Header(None)):
     data = payload.model_dump(exclude_unset=True)
-
-    if "car_id" in data and not db.get(Car, data["car_id"]):
-        raise HTTPException(400, "car_id does not exist")
-    if "mechanic_id" in data and not db.get(Mechanic, data["mechanic_id"]):
-        raise HTTPException(400, "mechanic_id does not exist")
-
-    for k, v in data.items():
-        setattr(o, k, v)
-
-    db.commit()
-    db.refresh(o)
-
-    return OrderOut(
-        id=o.id, car_id=o.car_id, mechanic_id=o.mechanic_id,
-        cost=float(o.cost), issue_date=o.issue_date, work_type=o.work_type,
-        planned_end_date=o.planned_end_date, actual_end_date=o.actual_end_date,
-        status=o.status, meta=o.meta
-    )
+    q = select(*ORDER_COLUMNS, row_version(Order)) if not data else update(Order).values(**data).returning(*ORDER_COLUMNS, row_version(Order))
+    q = q.where(Order.id == order_id)
+    if if_match is not None:
+        q = q.where(version_matches(Order, if_match))
+    # a missing order matches no row, so it is a 404 even if the new car/mechanic is invalid too
+    o = await write_returning(db, q)
+    if not o:
+        await raise_unmatched(db, Order, order_id, if_match, "Order not found")
+    return json_response(order_dict(o), headers={"ETag": row_etag(o.version)})
 
 @router.delete("/{order_id}", response_model=dict)
-def delete_order(order_id: int, db: Session = Depends(get_db)):
-    o = db.get(Order, order_id)
+async def delete_order(order_id: int, db: AsyncSession = Depends(get_db), if_match: str | None = Header(None)):
+    await check_if_match(db, Order, order_id, if_match, "Order not found")
+    o = await db.get(Order, order_id)
     if not o:
         raise HTTPException(404, "Order not found")
-    db.delete(o)
-    db.commit()
+    await db.delete(o)
+    await db.commit()
     return {"status": "ok"}
@@ -1,5 +1,6 @@
 from __future__ import annotations
-from datetime import date
+from datetime import date, datetime
+from typing import Any, Literal
 from pydantic import BaseModel, Field
 
 class CarCreate(BaseModel):
@@ -74,6 +75,42 @@ class OrderOut(BaseModel):
     status: str
     meta: dict
 
+class OrderSearchOut(OrderOut):
+    rank: float
+    headline: str
+
+class OrderChange(BaseModel):
+    op: Literal["upsert", "delete"]
+    id: int
+    order: OrderOut | None = None
+
+class OrderChanges(BaseModel):
+    changes: list[OrderChange]
+    # pass as ?since= on the next call; unchanged when nothing new happened
+    next_since: str
+    has_more: bool
+
+class DashboardOut(BaseModel):
+    panels: dict[str, Any]
+    # panel -> "timeout" | "error" for panels left out of `panels`
+    errors: dict[str, str]
+    timings_ms: dict[str, float]
+    partial: bool
+
+class JobOut(BaseModel):
+    id: int
+    kind: str
+    status: str
+    params: dict
+    total: int | None
+    processed: int
+    batches: int
+    error: str | None
+    created_at: datetime
+    started_at: datetime | None
+    updated_at: datetime
+    finished_at: datetime | None
+
 class OrderDetailsOut(BaseModel):
     id: int
     cost: float
@@ -85,3 +122,22 @@ class OrderDetailsOut(BaseModel):
     meta: dict
     car: CarOut
     mechanic: MechanicOut
+
+class CarBulkUpdate(CarUpdate):
+    id: int
+
+class MechanicBulkUpdate(MechanicUpdate):
+    id: int
+
+class OrderBulkUpdate(OrderUpdate):
+    id: int
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: int | None = None
+    error: str | None = None
+
+class BulkResult(BaseModel):
+    succeeded: int
+    failed: int
+    items: list[BulkItemResult]
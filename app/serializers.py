@@ -0,0 +1,139 @@
+from datetime import date, datetime
+from typing import TypedDict
+from fastapi import HTTPException, Response
+from fastapi.responses import ORJSONResponse
+from .models import Order, Car, Mechanic, Job
+
+# Handlers select these columns as Core rows (no ORM identity map) and map them to
+# plain dicts, which are rendered by orjson without a second response_model pass.
+
+ORDER_COLUMNS = (
+    Order.id, Order.car_id, Order.mechanic_id, Order.cost, Order.issue_date, Order.work_type,
+    Order.planned_end_date, Order.actual_end_date, Order.status, Order.meta,
+)
+CAR_COLUMNS = (Car.id, Car.number, Car.brand, Car.year, Car.owner_name)
+MECHANIC_COLUMNS = (Mechanic.id, Mechanic.employee_no, Mechanic.full_name, Mechanic.experience_years, Mechanic.grade)
+
+# fields= projections: the names a client may ask for; id is always returned
+ORDER_FIELDS = tuple(c.key for c in ORDER_COLUMNS)
+ORDER_DETAIL_FIELDS = (*(f for f in ORDER_FIELDS if f not in ("car_id", "mechanic_id")), "car", "mechanic")
+
+JOB_COLUMNS = (
+    Job.id, Job.kind, Job.status, Job.params, Job.total, Job.processed, Job.batches, Job.error,
+    Job.created_at, Job.started_at, Job.updated_at, Job.finished_at,
+)
+
+class CarRow(TypedDict):
+    id: int
+    number: str
+    brand: str
+    year: int
+    owner_name: str
+
+class MechanicRow(TypedDict):
+    id: int
+    employee_no: str
+    full_name: str
+    experience_years: int
+    grade: int
+
+class OrderRow(TypedDict):
+    id: int
+    car_id: int
+    mechanic_id: int
+    cost: float
+    issue_date: date
+    work_type: str
+    planned_end_date: date
+    actual_end_date: date | None
+    status: str
+    meta: dict
+
+class OrderSearchRow(OrderRow):
+    rank: float
+    headline: str
+
+class JobRow(TypedDict):
+    id: int
+    kind: str
+    status: str
+    params: dict
+    total: int | None
+    processed: int
+    batches: int
+    error: str | None
+    created_at: datetime
+    started_at: datetime | None
+    updated_at: datetime
+    finished_at: datetime | None
+
+class OrderDetailsRow(TypedDict):
+    id: int
+    cost: float
+    issue_date: date
+    work_type: str
+    planned_end_date: date
+    actual_end_date: date | None
+    status: str
+    meta: dict
+    car: CarRow
+    mechanic: MechanicRow
+
+def car_dict(r) -> CarRow:
+    return {"id": r.id, "number": r.number, "brand": r.brand, "year": r.year, "owner_name": r.owner_name}
+
+def mechanic_dict(r) -> MechanicRow:
+    return {
+        "id": r.id, "employee_no": r.employee_no, "full_name": r.full_name,
+        "experience_years": r.experience_years, "grade": r.grade,
+    }
+
+def order_dict(r) -> OrderRow:
+    return {
+        "id": r.id, "car_id": r.car_id, "mechanic_id": r.mechanic_id,
+        "cost": float(r.cost), "issue_date": r.issue_date, "work_type": r.work_type,
+        "planned_end_date": r.planned_end_date, "actual_end_date": r.actual_end_date,
+        "status": r.status, "meta": r.meta,
+    }
+
+def order_search_dict(r) -> OrderSearchRow:
+    return order_dict(r) | {"rank": r.rank, "headline": r.headline}
+
+def order_details_dict(r, car: CarRow, mechanic: MechanicRow) -> OrderDetailsRow:
+    """`car` and `mechanic` come from app.dimensions and are shared between rows."""
+    return {
+        "id": r.id, "cost": float(r.cost), "issue_date": r.issue_date, "work_type": r.work_type,
+        "planned_end_date": r.planned_end_date, "actual_end_date": r.actual_end_date,
+        "status": r.status, "meta": r.meta, "car": car, "mechanic": mechanic,
+    }
+
+def parse_fields(fields: str | None, allowed) -> tuple[str, ...] | None:
+    """`fields=status,cost` -> ("id", "status", "cost"); None when every field is wanted."""
+    if fields is None:
+        return None
+    names = tuple(dict.fromkeys(["id", *(f.strip() for f in fields.split(",") if f.strip())]))
+    unknown = [n for n in names if n not in allowed]
+    if unknown:
+        raise HTTPException(400, f"Unknown fields: {', '.join(unknown)}")
+    return names
+
+def order_columns(names, *extra: str) -> tuple:
+    """The ORDER_COLUMNS in `names`, plus `extra` ones the query needs (sort key, join keys)."""
+    wanted = {*names, *extra}
+    return tuple(c for c in ORDER_COLUMNS if c.key in wanted)
+
+def order_fields_dict(r, names) -> dict:
+    """order_dict restricted to `names`."""
+    d = {n: getattr(r, n) for n in names}
+    if "cost" in d:
+        d["cost"] = float(d["cost"])
+    return d
+
+def job_dict(r) -> JobRow:
+    return {c.key: getattr(r, c.key) for c in JOB_COLUMNS}
+
+def json_response(content, response: Response | None = None, status_code: int = 200, headers: dict | None = None) -> ORJSONResponse:
+    """Render `content` with orjson, keeping headers already set on the injected `response`."""
+    if response is not None:
+        headers = dict(response.headers) | (headers or {})
+    return ORJSONResponse(content, status_code=status_code, headers=headers)
@@ -0,0 +1,53 @@
+"""DB_MODE=sync handlers: one threadpool call per request.
+
+Handlers are written once against the AsyncSession API. With DB_MODE=sync, SyncModeRoute
+turns each async endpoint into a plain `def` that runs the coroutine on an event loop
+of the worker thread FastAPI calls it on, as it would a `def` handler. Inside it,
+ThreadedSession and the cache call their blocking counterparts directly instead of
+taking a threadpool round trip per call.
+"""
+import asyncio
+import functools
+import threading
+from contextvars import ContextVar
+from fastapi.concurrency import run_in_threadpool
+from fastapi.routing import APIRoute
+from .config import settings
+
+# True while a sync-mode handler runs on its worker thread, where blocking is fine
+on_worker_thread: ContextVar[bool] = ContextVar("on_worker_thread", default=False)
+
+_local = threading.local()
+
+def _loop() -> asyncio.AbstractEventLoop:
+    if getattr(_local, "loop", None) is None:
+        _local.loop = asyncio.new_event_loop()
+    return _local.loop
+
+async def run_blocking(fn, *args, **kwargs):
+    """Call a blocking `fn`: directly on a sync-mode handler's thread, otherwise on the threadpool."""
+    if on_worker_thread.get():
+        return fn(*args, **kwargs)
+    return await run_in_threadpool(fn, *args, **kwargs)
+
+def on_event_loop(fn):
+    """Keep an endpoint on the server's event loop in DB_MODE=sync, e.g. because it starts
+    background tasks there or runs queries concurrently."""
+    fn.on_event_loop = True
+    return fn
+
+def _on_worker_thread(fn):
+    @functools.wraps(fn)
+    def endpoint(*args, **kwargs):
+        token = on_worker_thread.set(True)
+        try:
+            return _loop().run_until_complete(fn(*args, **kwargs))
+        finally:
+            on_worker_thread.reset(token)
+    return endpoint
+
+class SyncModeRoute(APIRoute):
+    def __init__(self, path: str, endpoint, **kwargs):
+        if settings.db_mode == "sync" and asyncio.iscoroutinefunction(endpoint) and not getattr(endpoint, "on_event_loop", False):
+            endpoint = _on_worker_thread(endpoint)
+        super().__init__(path, endpoint, **kwargs)
@@ -0,0 +1,32 @@
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+
+# unique indexes and foreign keys -> 400 detail, as the bulk endpoints report them
+CONSTRAINT_ERRORS = {
+    "ix_cars_number": "number already exists",
+    "ix_mechanics_employee_no": "employee_no already exists",
+    "orders_car_id_fkey": "car_id does not exist",
+    "orders_mechanic_id_fkey": "mechanic_id does not exist",
+    # trigger from migration 0011, when autoservice.prevent_double_booking is on
+    "orders_no_double_booking": "mechanic is already booked for this period",
+}
+
+async def write_returning(db, stmt):
+    """Run one INSERT/UPDATE ... RETURNING and commit; returns the row, or None if nothing matched.
+
+    Existence of referenced rows is left to the constraints instead of checked up front,
+    so a single-row write is one statement plus the commit.
+    """
+    try:
+        row = (await db.execute(stmt.execution_options(synchronize_session=False))).first()
+        if row is None:
+            await db.rollback()
+            return None
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        detail = CONSTRAINT_ERRORS.get(getattr(e.orig.diag, "constraint_name", None))
+        if detail is None:
+            raise
+        raise HTTPException(400, detail)
+    return row
@@ -0,0 +1,17 @@
+import argparse
+import datetime as dt
+from app.database import engine
+from app.rollup import backfill
+
+def main():
+    ap = argparse.ArgumentParser(description="Rebuild mechanic_daily_revenue from orders")
+    ap.add_argument("--from", dest="day_from", type=dt.date.fromisoformat)
+    ap.add_argument("--to", dest="day_to", type=dt.date.fromisoformat)
+    args = ap.parse_args()
+
+    with engine.begin() as conn:
+        backfill(conn, args.day_from, args.day_to)
+    print("Backfill done")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import itertools
+import os
+import statistics
+import threading
+import time
+import requests
+
+BASE = os.getenv("BENCH_BASE", "http://localhost:5400")
+
+def percentile(samples, p):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    k = max(0, min(len(ordered) - 1, round(p / 100 * (len(ordered) - 1))))
+    return ordered[k]
+
+def summarize(samples_ms):
+    return {
+        "n": len(samples_ms),
+        "mean_ms": round(statistics.fmean(samples_ms), 3) if samples_ms else 0.0,
+        "p50_ms": round(percentile(samples_ms, 50), 3),
+        "p95_ms": round(percentile(samples_ms, 95), 3),
+        "p99_ms": round(percentile(samples_ms, 99), 3),
+    }
+
+def timed_get(session, path, params=None):
+    t0 = time.perf_counter()
+    r = session.get(BASE + path, params=params, timeout=60)
+    elapsed = (time.perf_counter() - t0) * 1000
+    r.raise_for_status()
+    return r, elapsed
+
+def timed_request(session, method, path, **kwargs):
+    t0 = time.perf_counter()
+    r = session.request(method, BASE + path, timeout=60, **kwargs)
+    elapsed = (time.perf_counter() - t0) * 1000
+    r.raise_for_status()
+    return r, elapsed
+
+def measure(session, path, params=None, repeat=20):
+    timed_get(session, path, params)  # warm-up
+    return summarize([timed_get(session, path, params)[1] for _ in range(repeat)])
+
+def run_load(workload, concurrency, duration_s):
+    """Drive (path, params) pairs round-robin from `concurrency` threads for `duration_s` seconds.
+
+    Returns {path: {"latencies_ms": [...], "errors": n}} plus the wall time.
+    """
+    results = {path: {"latencies_ms": [], "errors": 0} for path, _ in workload}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration_s
+
+    def worker(offset):
+        s = requests.Session()
+        for path, params in itertools.islice(itertools.cycle(workload), offset, None):
+            if time.perf_counter() >= deadline:
+                return
+            try:
+                _, ms = timed_get(s, path, params)
+            except requests.RequestException:
+                with lock:
+                    results[path]["errors"] += 1
+                continue
+            with lock:
+                results[path]["latencies_ms"].append(ms)
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, time.perf_counter() - t0
+
+def run_scenario(scenario, concurrency, duration_s):
+    """Call `scenario(session)` -> (method, path, kwargs) from `concurrency` threads for `duration_s` seconds.
+
+    A scenario returns None once it is exhausted (e.g. no prepared ids left to
+    delete); that worker then stops early. Returns ({"latencies_ms": [...], "errors": n}, wall time).
+    """
+    result = {"latencies_ms": [], "errors": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration_s
+
+    def worker():
+        s = requests.Session()
+        while time.perf_counter() < deadline:
+            req = scenario(s)
+            if req is None:
+                return
+            method, path, kwargs = req
+            try:
+                _, ms = timed_request(s, method, path, **kwargs)
+            except requests.RequestException:
+                with lock:
+                    result["errors"] += 1
+                continue
+            with lock:
+                result["latencies_ms"].append(ms)
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return result, time.perf_counter() - t0
@@ -0,0 +1,108 @@
+"""Before/after benchmark for index changes: insert throughput, index size and query latency.
+
+    PYTHONPATH=. alembic downgrade 0005_mechanic_daily_revenue
+    PYTHONPATH=. python scripts/bench_indexes.py --out before.json
+    PYTHONPATH=. alembic upgrade head
+    PYTHONPATH=. python scripts/bench_indexes.py --out after.json --compare before.json
+
+Queries are built with the same helpers as the endpoints and timed directly
+against the database, so HTTP and serialization do not blur the difference.
+"""
+import argparse
+import datetime as dt
+import itertools
+import json
+import math
+import statistics
+import time
+from sqlalchemy import func, select, text
+from generate_data import CHUNK, ORDER_COLUMNS as COPY_COLUMNS, copy_in, csv_batches, orders
+from app.database import engine
+from app.filters import OrderFilter
+from app.models import Order
+from app.pagination import paginate
+from app.serializers import ORDER_COLUMNS
+
+def _filter(**kwargs):
+    params = dict(brand=None, min_cost=None, max_cost=None, grade_gte=None, issue_from=None, issue_to=None)
+    return OrderFilter(**(params | kwargs))
+
+def queries(day):
+    month = {"issue_from": day, "issue_to": day + dt.timedelta(days=30)}
+    return {
+        "filter brand + month": paginate(_filter(brand="BMW", **month).apply(select(*ORDER_COLUMNS)), Order, "id", "asc", 50),
+        "filter grade + month": paginate(_filter(grade_gte=5, **month).apply(select(*ORDER_COLUMNS)), Order, "id", "asc", 50),
+        "filter cost range by cost": paginate(_filter(min_cost=500, max_cost=510).apply(select(*ORDER_COLUMNS)), Order, "cost", "asc", 50),
+        "with-details by issue_date": paginate(select(*ORDER_COLUMNS), Order, "issue_date", "desc", 50),
+        "rollup backfill month": (
+            select(Order.mechanic_id, Order.issue_date, func.sum(Order.cost), func.count())
+            .where(Order.issue_date.between(month["issue_from"], month["issue_to"]))
+            .group_by(Order.mechanic_id, Order.issue_date)
+        ),
+        "orders of one mechanic": select(func.sum(Order.cost)).where(Order.mechanic_id == 1, Order.issue_date >= day),
+        "overdue orders": select(func.count()).where(Order.actual_end_date > Order.planned_end_date),
+    }
+
+def time_query(conn, q, repeat):
+    conn.execute(q).all()  # warm-up
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        conn.execute(q).all()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return round(statistics.median(samples), 3)
+
+def insert_rate(conn, rows):
+    """Rows/s for one COPY of generated orders (index upkeep and rollup triggers included),
+    rolled back afterwards."""
+    tx = conn.begin()
+    n_cars, n_mechanics = conn.execute(text("SELECT (SELECT max(id) FROM cars), (SELECT max(id) FROM mechanics)")).one()
+    lo = conn.execute(text("SELECT max(id) FROM orders")).scalar() + 1
+    generated = itertools.chain.from_iterable(
+        orders(0, c, rows, n_cars, n_mechanics, dt.date.today(), 365) for c in range(math.ceil(rows / CHUNK)))
+    # rows are built up front so only the load itself is timed
+    batches = list(csv_batches((lo + k, *row[1:]) for k, row in enumerate(generated)))
+    t0 = time.perf_counter()
+    copy_in(conn.connection.driver_connection, "orders", COPY_COLUMNS, batches)
+    elapsed = time.perf_counter() - t0
+    tx.rollback()
+    return round(rows / elapsed, 1)
+
+def _flat(r):
+    return {"index size, MB": r["index_mb"], "insert rows/s": r["insert_rows_per_s"]} | {
+        f"{name}, ms": ms for name, ms in r["latency_ms"].items()}
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--insert-rows", type=int, default=50_000)
+    ap.add_argument("--out", default="bench_indexes.json")
+    ap.add_argument("--compare", help="earlier result file to diff against")
+    args = ap.parse_args()
+
+    with engine.connect() as conn:
+        revision = conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+        index_bytes = conn.execute(text(
+            "SELECT sum(pg_relation_size(indexrelid)) FROM pg_index "
+            "WHERE indrelid IN ('orders'::regclass, 'cars'::regclass, 'mechanics'::regclass)"
+        )).scalar()
+        first_day = conn.execute(select(func.min(Order.issue_date))).scalar()
+        latency = {name: time_query(conn, q, args.repeat) for name, q in queries(first_day + dt.timedelta(days=90)).items()}
+        conn.commit()
+        rate = insert_rate(conn, args.insert_rows)
+
+    result = {"revision": revision, "index_mb": round(int(index_bytes) / 2**20, 1), "insert_rows_per_s": rate, "latency_ms": latency}
+    with open(args.out, "w") as fh:
+        json.dump(result, fh, indent=2)
+
+    before = None
+    if args.compare:
+        with open(args.compare) as fh:
+            before = json.load(fh)
+    old = _flat(before) if before else {}
+    print(f"{'metric':34} {'before':>10} {'after':>10}")
+    for label, value in _flat(result).items():
+        print(f"{label:34} {old.get(label, '-'):>10} {value:>10}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""Fixed-concurrency load test for comparing DB_MODE=sync and DB_MODE=async.
+
+Start the API with one mode, run this script, restart with the other mode and
+run it again against the same database. In sync mode each request of the mix is one
+threadpool call with blocking database calls, as with `def` handlers (app/sync_mode.py).
+"""
+import argparse
+from bench_common import run_load, summarize
+
+MIX = [
+    ("/orders", {"limit": 50}),
+    ("/orders/1", None),
+    ("/cars", {"limit": 50}),
+    ("/mechanics", {"limit": 50}),
+    ("/analytics/orders/filter", {"min_cost": 100, "limit": 50}),
+    ("/analytics/orders/with-details", {"limit": 50}),
+    ("/analytics/revenue/by-mechanic", None),
+]
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--concurrency", type=int, default=64)
+    ap.add_argument("--duration", type=float, default=30)
+    args = ap.parse_args()
+
+    results, wall = run_load(MIX, args.concurrency, args.duration)
+    total = sum(len(r["latencies_ms"]) for r in results.values())
+    print(f"concurrency={args.concurrency} requests={total} throughput={total / wall:.1f} req/s")
+    for path, r in results.items():
+        st = summarize(r["latencies_ms"])
+        print(f"{path:34} n={st['n']:>6} p50={st['p50_ms']:>8.2f} p95={st['p95_ms']:>8.2f} p99={st['p99_ms']:>8.2f} errors={r['errors']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Regex vs structured (containment / jsonpath) search over orders.meta.
+
+    PYTHONPATH=. python scripts/bench_suite.py generate --scale 1m    # seed-style meta
+    PYTHONPATH=. python scripts/bench_meta_search.py
+
+Each case runs the /analytics/orders/search-meta query (first page of 50 by id)
+and a count(*) of all matches, once with a regex over meta::text (trigram index)
+and once with the equivalent @> / @? condition (jsonb_path_ops index).
+"""
+import argparse
+from sqlalchemy import func, select
+from bench_indexes import time_query
+from app.database import engine
+from app.filters import meta_conditions
+from app.models import Order
+from app.pagination import paginate
+from app.serializers import ORDER_COLUMNS
+
+# meta::text renders keys as {"parts": [{"qty": 3, "name": "pads"}], "comment": ..., "symptoms": ...}
+CASES = [
+    ("part is pads", {"pattern": '"name": "pads"'}, {"meta_contains": '{"parts":[{"name":"pads"}]}'}),
+    ("symptom is шум", {"pattern": '"symptoms": "шум"'}, {"meta_contains": '{"symptoms":"шум"}'}),
+    ("any part with qty > 2", {"pattern": '"qty": [3-9]'}, {"jsonpath": "$.parts[*] ? (@.qty > 2)"}),
+    (
+        "4 pads + не заводится",
+        {"pattern": '"qty": 4, "name": "pads".*"symptoms": "не заводится"'},
+        {"meta_contains": '{"symptoms":"не заводится","parts":[{"name":"pads","qty":4}]}'},
+    ),
+    ("no match", {"pattern": '"name": "turbo"'}, {"meta_contains": '{"parts":[{"name":"turbo"}]}'}),
+]
+
+def _where(params):
+    return meta_conditions(params.get("pattern"), params.get("meta_contains"), params.get("jsonpath"))
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeat", type=int, default=10)
+    args = ap.parse_args()
+
+    print(f"{'case':26} {'mode':10} {'matches':>9} {'page ms':>9} {'count ms':>9}")
+    with engine.connect() as conn:
+        for name, regex, structured in CASES:
+            for mode, params in (("regex", regex), ("structured", structured)):
+                page = paginate(select(*ORDER_COLUMNS).where(*_where(params)), Order, "id", "asc", 50)
+                count = select(func.count()).select_from(Order).where(*_where(params))
+                matches = conn.execute(count).scalar()
+                print(f"{name:26} {mode:10} {matches:>9} {time_query(conn, page, args.repeat):>9.2f} "
+                      f"{time_query(conn, count, args.repeat):>9.2f}")
+
+if __name__ == "__main__":
+    main()
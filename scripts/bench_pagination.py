@@ -0,0 +1,39 @@
+"""Page-N latency: offset pagination vs keyset cursors.
+
+For every depth the cursor is taken from the X-Next-Cursor header of the
+offset page just before it, so both modes return exactly the same rows.
+"""
+import argparse
+import requests
+from bench_common import measure, timed_get
+
+ENDPOINTS = ["/orders", "/analytics/orders/filter", "/analytics/orders/with-details"]
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--limit", type=int, default=50)
+    ap.add_argument("--depths", default="0,1000,10000,100000,500000")
+    ap.add_argument("--sort-by", default="issue_date")
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    s = requests.Session()
+    print(f"{'endpoint':32} {'depth':>8} {'offset p50':>11} {'cursor p50':>11}")
+    for path in ENDPOINTS:
+        for depth in map(int, args.depths.split(",")):
+            params = {"limit": args.limit, "sort_by": args.sort_by, "sort_dir": "asc"}
+            if depth:
+                r, _ = timed_get(s, path, {**params, "offset": max(depth - args.limit, 0)})
+                cursor = r.headers.get("X-Next-Cursor")
+                if not cursor:
+                    print(f"{path:32} {depth:>8} (table has fewer rows)")
+                    break
+            else:
+                cursor = None
+
+            offset_stats = measure(s, path, {**params, "offset": depth}, args.repeat)
+            cursor_stats = measure(s, path, {**params, "cursor": cursor} if cursor else params, args.repeat)
+            print(f"{path:32} {depth:>8} {offset_stats['p50_ms']:>9.2f}ms {cursor_stats['p50_ms']:>9.2f}ms")
+
+if __name__ == "__main__":
+    main()
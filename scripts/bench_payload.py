@@ -0,0 +1,57 @@
+"""Bytes on the wire and latency of a 200-row page, by fields= projection and encoding.
+
+    CACHE_BACKEND=none uvicorn app.main:app ...
+    PYTHONPATH=. python scripts/bench_payload.py
+    PYTHONPATH=. python scripts/bench_payload.py --calls 100 --out payload.json
+
+Run the API with CACHE_BACKEND=none: encodings share the cache entries of their
+page, so a cached server would time only compression. "br" is skipped when the
+server has no brotli package.
+"""
+import argparse
+import json
+import time
+import requests
+from bench_common import BASE, summarize
+
+PAGE = 200
+ENDPOINTS = {
+    "/orders": {"all": None, "id,status,cost": "status,cost"},
+    "/analytics/orders/with-details": {"all": None, "id,status,cost": "status,cost", "id,status,car": "status,car"},
+}
+ENCODINGS = ["identity", "gzip", "br"]
+
+def call(s, path, fields, encoding, offset):
+    params = {"limit": PAGE, "offset": offset} | ({"fields": fields} if fields else {})
+    t0 = time.perf_counter()
+    r = s.get(BASE + path, params=params, headers={"Accept-Encoding": encoding}, stream=True, timeout=60)
+    wire = r.raw.read(decode_content=False)
+    ms = (time.perf_counter() - t0) * 1000
+    r.raise_for_status()
+    return len(wire), r.headers.get("Content-Encoding", "identity"), ms
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--calls", type=int, default=50)
+    ap.add_argument("--out", default="bench_payload.json")
+    args = ap.parse_args()
+
+    s = requests.Session()
+    result = {}
+    print(f"{'endpoint':32} {'fields':16} {'encoding':9} {'bytes':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for path, variants in ENDPOINTS.items():
+        for label, fields in variants.items():
+            for encoding in ENCODINGS:
+                size, sent, _ = call(s, path, fields, encoding, 0)
+                if sent != encoding:
+                    continue
+                latencies = [call(s, path, fields, encoding, PAGE * (i % 10))[2] for i in range(args.calls)]
+                row = summarize(latencies) | {"bytes": size}
+                result[f"{path} fields={label} {encoding}"] = row
+                print(f"{path:32} {label:16} {encoding:9} {size:>9} {row['p50_ms']:>8} {row['p95_ms']:>8}")
+
+    with open(args.out, "w") as fh:
+        json.dump(result, fh, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Old vs new row serialization, per endpoint shape, for a 200-row page.
+
+old: ORM entity -> hand-built Pydantic model -> response_model validation ->
+     jsonable output -> json.dumps (what FastAPI does for a returned model list)
+new: Core row -> dict -> orjson
+
+Runs in-process on synthetic rows. With --db, it also times loading the page as
+ORM entities vs Core rows from the database set in DATABASE_URL.
+
+    PYTHONPATH=. python scripts/bench_serialization.py --db
+"""
+import argparse
+import datetime as dt
+import json
+import time
+from types import SimpleNamespace
+from pydantic import TypeAdapter
+from fastapi.responses import ORJSONResponse
+from app.schemas import OrderOut, OrderDetailsOut, CarOut, MechanicOut
+from app.serializers import car_dict, mechanic_dict, order_dict, CAR_COLUMNS, MECHANIC_COLUMNS
+
+# FastAPI builds these once per route
+ORDERS_ADAPTER = TypeAdapter(list[OrderOut])
+DETAILS_ADAPTER = TypeAdapter(list[OrderDetailsOut])
+DICTS_ADAPTER = TypeAdapter(list[dict])
+MECHANICS_ADAPTER = TypeAdapter(list[MechanicOut])
+
+def fake_order(i):
+    return SimpleNamespace(
+        id=i, car_id=i % 200 + 1, mechanic_id=i % 40 + 1, cost=123.45, issue_date=dt.date(2024, 1, 1),
+        work_type="Диагностика", planned_end_date=dt.date(2024, 1, 5), actual_end_date=None, status="new",
+        meta={"symptoms": "шум", "comment": f"client note #{i} urgent", "parts": [{"name": "pads", "qty": 2}]},
+    )
+
+def fake_car(i):
+    return SimpleNamespace(id=i, number=f"AA{i:04d}BB", brand="Kia", year=2015, owner_name=f"Owner {i}")
+
+def fake_mechanic(i):
+    return SimpleNamespace(id=i, employee_no=f"EMP{i:04d}", full_name=f"Mechanic {i}", experience_years=5, grade=3)
+
+def old_order(o):
+    return OrderOut(
+        id=o.id, car_id=o.car_id, mechanic_id=o.mechanic_id,
+        cost=float(o.cost), issue_date=o.issue_date, work_type=o.work_type,
+        planned_end_date=o.planned_end_date, actual_end_date=o.actual_end_date,
+        status=o.status, meta=o.meta
+    )
+
+def old_details(o, c, m):
+    return OrderDetailsOut(
+        id=o.id, cost=float(o.cost), issue_date=o.issue_date, work_type=o.work_type,
+        planned_end_date=o.planned_end_date, actual_end_date=o.actual_end_date, status=o.status, meta=o.meta,
+        car=CarOut(id=c.id, number=c.number, brand=c.brand, year=c.year, owner_name=c.owner_name),
+        mechanic=MechanicOut(id=m.id, employee_no=m.employee_no, full_name=m.full_name,
+                             experience_years=m.experience_years, grade=m.grade),
+    )
+
+def new_details(o, c, m):
+    d = order_dict(o)
+    del d["car_id"], d["mechanic_id"]
+    d["car"] = car_dict(c)
+    d["mechanic"] = mechanic_dict(m)
+    return d
+
+def fastapi_render(adapter, content):
+    # validate against response_model, then serialize and render like JSONResponse
+    value = adapter.validate_python(content)
+    return json.dumps(adapter.dump_python(value, mode="json"), ensure_ascii=False).encode()
+
+def bench(fn, repeat):
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1000
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=200)
+    ap.add_argument("--repeat", type=int, default=200)
+    ap.add_argument("--db", action="store_true")
+    args = ap.parse_args()
+
+    orders = [fake_order(i) for i in range(args.rows)]
+    cars = [fake_car(i) for i in range(args.rows)]
+    mechs = [fake_mechanic(i) for i in range(args.rows)]
+
+    cases = {
+        "GET /orders, /analytics/orders/filter, /search-meta": (
+            lambda: fastapi_render(ORDERS_ADAPTER, [old_order(o) for o in orders]),
+            lambda: ORJSONResponse([order_dict(o) for o in orders]).body,
+        ),
+        "GET /analytics/orders/with-details": (
+            lambda: fastapi_render(DETAILS_ADAPTER, [old_details(o, c, m) for o, c, m in zip(orders, cars, mechs)]),
+            lambda: ORJSONResponse([new_details(o, c, m) for o, c, m in zip(orders, cars, mechs)]).body,
+        ),
+        "GET /cars": (
+            lambda: fastapi_render(DICTS_ADAPTER, [car_dict(c) for c in cars]),
+            lambda: ORJSONResponse([car_dict(c) for c in cars]).body,
+        ),
+        "GET /mechanics": (
+            lambda: fastapi_render(MECHANICS_ADAPTER, [
+                MechanicOut(id=x.id, employee_no=x.employee_no, full_name=x.full_name,
+                            experience_years=x.experience_years, grade=x.grade) for x in mechs]),
+            lambda: ORJSONResponse([mechanic_dict(m) for m in mechs]).body,
+        ),
+    }
+
+    print(f"{args.rows} rows per page, mean of {args.repeat} runs")
+    print(f"{'endpoint':52} {'old ms':>8} {'new ms':>8} {'speedup':>8}")
+    for name, (old, new) in cases.items():
+        t_old, t_new = bench(old, args.repeat), bench(new, args.repeat)
+        print(f"{name:52} {t_old:>8.3f} {t_new:>8.3f} {t_old / t_new:>7.1f}x")
+
+    if args.db:
+        bench_db(args.rows, args.repeat)
+
+def bench_db(rows, repeat):
+    from sqlalchemy import select
+    from app.database import SessionLocal
+    from app.models import Order, Car, Mechanic
+    from app.serializers import ORDER_COLUMNS
+
+    with SessionLocal() as db:
+        def orm():
+            db.expunge_all()
+            return [old_order(o) for o in db.execute(select(Order).order_by(Order.id).limit(rows)).scalars()]
+
+        def core():
+            return [order_dict(r) for r in db.execute(select(*ORDER_COLUMNS).order_by(Order.id).limit(rows))]
+
+        def orm_cars():
+            db.expunge_all()
+            return [car_dict(c) for c in db.execute(select(Car).limit(rows)).scalars()]
+
+        def core_cars():
+            return [car_dict(c) for c in db.execute(select(*CAR_COLUMNS).limit(rows))]
+
+        def orm_mechanics():
+            db.expunge_all()
+            return [mechanic_dict(m) for m in db.execute(select(Mechanic).limit(rows)).scalars()]
+
+        def core_mechanics():
+            return [mechanic_dict(m) for m in db.execute(select(*MECHANIC_COLUMNS).limit(rows))]
+
+        print("\nload + map from the database (includes the query round trip)")
+        for name, old, new in [("orders", orm, core), ("cars", orm_cars, core_cars), ("mechanics", orm_mechanics, core_mechanics)]:
+            t_old, t_new = bench(old, repeat), bench(new, repeat)
+            print(f"{name:52} {t_old:>8.3f} {t_new:>8.3f} {t_old / t_new:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""Reproducible benchmark suite for every API route.
+
+    PYTHONPATH=. python scripts/bench_suite.py generate --scale 1m
+    PYTHONPATH=. python scripts/bench_suite.py run --concurrency 16 --duration 10 --out before.json
+    PYTHONPATH=. python scripts/bench_suite.py compare before.json after.json
+
+`generate` rebuilds the dataset in Postgres (DATABASE_URL) with the options of
+scripts/generate_data.py, `run` drives each route of app.main in turn against
+BENCH_BASE, and `compare` diffs two result files.
+"""
+import argparse
+import datetime as dt
+import itertools
+import json
+import random
+import re
+import subprocess
+import sys
+from collections import deque
+import requests
+from sqlalchemy import text
+from bench_common import BASE, run_scenario, summarize
+from app.database import engine
+from generate_data import BRANDS, NOTES, PARTS, SYMPTOMS, WORKS, add_arguments, generate
+
+class Fixture:
+    """Ids sampled from the current dataset plus payload builders for write routes."""
+
+    def __init__(self, seed: int, prepare: int):
+        self.rng = random.Random(seed)
+        self.prepare = prepare
+        self.tag = dt.datetime.now().strftime("%y%m%d%H%M%S")
+        self.seq = itertools.count()
+        with engine.connect() as conn:
+            sample = "SELECT id FROM {} ORDER BY random() LIMIT 5000"
+            self.car_ids = conn.execute(text(sample.format("cars"))).scalars().all()
+            self.mechanic_ids = conn.execute(text(sample.format("mechanics"))).scalars().all()
+            self.order_ids = conn.execute(text(sample.format("orders"))).scalars().all()
+            self.first_day, self.last_day = conn.execute(text("SELECT min(issue_date), max(issue_date) FROM orders")).one()
+        if not (self.car_ids and self.mechanic_ids and self.order_ids):
+            raise SystemExit("Dataset is empty, run `bench_suite.py generate` first")
+
+    def car_id(self):
+        return self.rng.choice(self.car_ids)
+
+    def mechanic_id(self):
+        return self.rng.choice(self.mechanic_ids)
+
+    def order_id(self):
+        return self.rng.choice(self.order_ids)
+
+    def day(self):
+        return self.first_day + dt.timedelta(days=self.rng.randint(0, (self.last_day - self.first_day).days))
+
+    def window(self, days=7):
+        start = self.day()
+        return {"issue_from": str(start), "issue_to": str(start + dt.timedelta(days=days))}
+
+    def period(self, days=3):
+        start = self.day()
+        return {"date_from": str(start), "date_to": str(start + dt.timedelta(days=days))}
+
+    def car(self):
+        n = next(self.seq)
+        return {"number": f"B{self.tag}-{n}", "brand": self.rng.choice(BRANDS),
+                "year": self.rng.randint(1998, 2024), "owner_name": f"Bench owner {n}"}
+
+    def mechanic(self):
+        n = next(self.seq)
+        return {"employee_no": f"B{self.tag}-{n}", "full_name": f"Bench mechanic {n}",
+                "experience_years": self.rng.randint(0, 25), "grade": self.rng.randint(1, 6)}
+
+    def order(self):
+        issue = self.day()
+        planned = issue + dt.timedelta(days=self.rng.randint(1, 14))
+        return {
+            "car_id": self.car_id(), "mechanic_id": self.mechanic_id(),
+            "cost": round(self.rng.uniform(10, 1500), 2), "issue_date": str(issue),
+            "work_type": self.rng.choice(WORKS), "planned_end_date": str(planned),
+            "meta": {"symptoms": self.rng.choice(SYMPTOMS), "comment": f"bench note {self.rng.choice(NOTES)}",
+                     "parts": [{"name": self.rng.choice(PARTS), "qty": self.rng.randint(1, 4)}]},
+        }
+
+    def job_id(self) -> int:
+        """Latest background job, enqueuing one (untimed) on a fresh database."""
+        with engine.connect() as conn:
+            job_id = conn.execute(text("SELECT max(id) FROM jobs")).scalar()
+        if job_id is None:
+            r = requests.post(BASE + "/analytics/orders/close-overdue", timeout=60)
+            r.raise_for_status()
+            job_id = r.json()["id"]
+        return job_id
+
+    def created(self, path: str, build, n: int | None = None) -> deque:
+        """Insert rows through the bulk endpoint (untimed) so delete routes have something to drain."""
+        n = n or self.prepare
+        ids = deque()
+        for start in range(0, n, 1000):
+            items = [build() for _ in range(min(1000, n - start))]
+            r = requests.post(BASE + path + "/bulk", json=items, timeout=300)
+            r.raise_for_status()
+            ids.extend(it["id"] for it in r.json()["items"] if it["id"] is not None)
+        return ids
+
+def _get(path, params=None):
+    return lambda s: ("GET", path(), {"params": params() if params else None})
+
+def _drain(ids: deque, request):
+    def scenario(s):
+        try:
+            victim = ids.popleft()
+        except IndexError:
+            return None
+        return request(victim)
+    return scenario
+
+def _chunks(ids: deque, size: int) -> deque:
+    return deque(list(itertools.islice(ids, i, i + size)) for i in range(0, len(ids), size))
+
+BULK = 100
+SORTS = {"cars": ["id", "brand", "year"], "mechanics": ["id", "grade", "experience_years"],
+         "orders": ["id", "cost", "issue_date", "actual_end_date", "status"]}
+
+def _list(fx, resource):
+    return lambda: {"limit": 50, "sort_by": fx.rng.choice(SORTS[resource]), "sort_dir": fx.rng.choice(["asc", "desc"])}
+
+# "METHOD /path" -> factory(fixture) -> scenario(session) -> (method, path, request kwargs)
+SCENARIOS = {
+    "GET /cars": lambda fx: _get(lambda: "/cars", _list(fx, "cars")),
+    "GET /cars/{car_id}": lambda fx: _get(lambda: f"/cars/{fx.car_id()}"),
+    "GET /mechanics": lambda fx: _get(lambda: "/mechanics", _list(fx, "mechanics")),
+    "GET /mechanics/{mechanic_id}": lambda fx: _get(lambda: f"/mechanics/{fx.mechanic_id()}"),
+    "GET /mechanics/available": lambda fx: _get(lambda: "/mechanics/available", lambda: {"limit": 50, **fx.period()}),
+    "GET /orders": lambda fx: _get(lambda: "/orders", _list(fx, "orders")),
+    "GET /orders/{order_id}": lambda fx: _get(lambda: f"/orders/{fx.order_id()}"),
+    "GET /orders/overlapping": lambda fx: _get(lambda: "/orders/overlapping", lambda: {
+        "mechanic_id": fx.mechanic_id(), "limit": 50, **fx.period()}),
+    "GET /orders/changes": lambda fx: _get(lambda: "/orders/changes", lambda: {"limit": 500}),
+    "GET /orders/export": lambda fx: _get(lambda: "/orders/export", lambda: {"format": "ndjson", **fx.window()}),
+    "GET /analytics/orders/filter": lambda fx: _get(lambda: "/analytics/orders/filter", lambda: {
+        "brand": fx.rng.choice(BRANDS), "min_cost": fx.rng.randint(0, 1000), "grade_gte": fx.rng.randint(1, 6), "limit": 50}),
+    "GET /analytics/orders/with-details": lambda fx: _get(lambda: "/analytics/orders/with-details", lambda: {
+        "limit": 50, "sort_by": fx.rng.choice(SORTS["orders"])}),
+    "GET /analytics/revenue/by-mechanic": lambda fx: _get(lambda: "/analytics/revenue/by-mechanic", fx.window),
+    "GET /analytics/dashboard": lambda fx: _get(lambda: "/analytics/dashboard", lambda: fx.window(90)),
+    "GET /analytics/orders/search-meta": lambda fx: _get(lambda: "/analytics/orders/search-meta", lambda: {
+        "pattern": f"note #{fx.rng.randint(1, 9999)} ", "limit": 50}),
+    "GET /analytics/orders/search": lambda fx: _get(lambda: "/analytics/orders/search", lambda: {
+        "q": f"{fx.rng.choice(SYMPTOMS)} {fx.rng.choice(WORKS)}", **fx.window(30)}),
+    "GET /analytics/jobs/{job_id}": lambda fx: (lambda job_id: _get(lambda: f"/analytics/jobs/{job_id}"))(fx.job_id()),
+
+    "POST /cars": lambda fx: lambda s: ("POST", "/cars", {"json": fx.car()}),
+    "POST /cars/bulk": lambda fx: lambda s: ("POST", "/cars/bulk", {"json": [fx.car() for _ in range(BULK)]}),
+    "PUT /cars/{car_id}": lambda fx: lambda s: ("PUT", f"/cars/{fx.car_id()}", {"json": {"year": fx.rng.randint(1998, 2024)}}),
+    "PUT /cars/bulk": lambda fx: lambda s: ("PUT", "/cars/bulk", {
+        "json": [{"id": fx.car_id(), "year": fx.rng.randint(1998, 2024)} for _ in range(BULK)]}),
+    "DELETE /cars/{car_id}": lambda fx: _drain(fx.created("/cars", fx.car), lambda i: ("DELETE", f"/cars/{i}", {})),
+    "DELETE /cars/bulk": lambda fx: _drain(_chunks(fx.created("/cars", fx.car), BULK), lambda ids: ("DELETE", "/cars/bulk", {"json": ids})),
+
+    "POST /mechanics": lambda fx: lambda s: ("POST", "/mechanics", {"json": fx.mechanic()}),
+    "POST /mechanics/bulk": lambda fx: lambda s: ("POST", "/mechanics/bulk", {"json": [fx.mechanic() for _ in range(BULK)]}),
+    "PUT /mechanics/{mechanic_id}": lambda fx: lambda s: ("PUT", f"/mechanics/{fx.mechanic_id()}", {
+        "json": {"experience_years": fx.rng.randint(0, 25)}}),
+    "PUT /mechanics/bulk": lambda fx: lambda s: ("PUT", "/mechanics/bulk", {
+        "json": [{"id": fx.mechanic_id(), "experience_years": fx.rng.randint(0, 25)} for _ in range(BULK)]}),
+    "DELETE /mechanics/{mechanic_id}": lambda fx: _drain(fx.created("/mechanics", fx.mechanic), lambda i: ("DELETE", f"/mechanics/{i}", {})),
+    "DELETE /mechanics/bulk": lambda fx: _drain(_chunks(fx.created("/mechanics", fx.mechanic), BULK), lambda ids: ("DELETE", "/mechanics/bulk", {"json": ids})),
+
+    "POST /orders": lambda fx: lambda s: ("POST", "/orders", {"json": fx.order()}),
+    "POST /orders/bulk": lambda fx: lambda s: ("POST", "/orders/bulk", {"json": [fx.order() for _ in range(BULK)]}),
+    "PUT /orders/{order_id}": lambda fx: lambda s: ("PUT", f"/orders/{fx.order_id()}", {"json": {"cost": round(fx.rng.uniform(10, 1500), 2)}}),
+    "PUT /orders/bulk": lambda fx: lambda s: ("PUT", "/orders/bulk", {
+        "json": [{"id": fx.order_id(), "cost": round(fx.rng.uniform(10, 1500), 2)} for _ in range(BULK)]}),
+    "DELETE /orders/{order_id}": lambda fx: _drain(fx.created("/orders", fx.order), lambda i: ("DELETE", f"/orders/{i}", {})),
+    "DELETE /orders/bulk": lambda fx: _drain(_chunks(fx.created("/orders", fx.order), BULK), lambda ids: ("DELETE", "/orders/bulk", {"json": ids})),
+    "POST /analytics/orders/close-overdue": lambda fx: lambda s: ("POST", "/analytics/orders/close-overdue", {}),
+}
+
+# close-overdue only enqueues a job (one active per kind); more clients would measure the same
+# deduplicated response
+CONCURRENCY = {"POST /analytics/orders/close-overdue": 1}
+
+def app_routes() -> list[str]:
+    from fastapi.routing import APIRoute
+    from app.main import app
+    return [
+        f"{method} {route.path}"
+        for route in app.routes
+        if isinstance(route, APIRoute) and not route.path.startswith("/internal")
+        for method in sorted(route.methods)
+    ]
+
+def _git_rev():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(args):
+    routes = app_routes()
+    missing = [r for r in routes if r not in SCENARIOS]
+    if missing:
+        raise SystemExit("No benchmark scenario for: " + ", ".join(missing))
+    # reads first, so write routes cannot change what they measure
+    routes.sort(key=lambda r: not r.startswith("GET "))
+    if args.only:
+        routes = [r for r in routes if re.search(args.only, r)]
+
+    fx = Fixture(args.seed, args.prepare)
+    with engine.connect() as conn:
+        counts = dict(conn.execute(text(
+            "SELECT 'cars', count(*) FROM cars UNION ALL SELECT 'mechanics', count(*) FROM mechanics "
+            "UNION ALL SELECT 'orders', count(*) FROM orders"
+        )).all())
+    pool = requests.get(BASE + "/internal/pool", timeout=10).json()
+
+    endpoints = {}
+    for route in routes:
+        concurrency = CONCURRENCY.get(route, args.concurrency)
+        result, wall = run_scenario(SCENARIOS[route](fx), concurrency, args.duration)
+        stats = summarize(result["latencies_ms"])
+        stats.update(errors=result["errors"], concurrency=concurrency,
+                     throughput_rps=round(stats["n"] / wall, 2) if wall else 0.0)
+        endpoints[route] = stats
+        print(f"{route:42} n={stats['n']:>6} rps={stats['throughput_rps']:>8.1f} "
+              f"p50={stats['p50_ms']:>8.2f} p95={stats['p95_ms']:>8.2f} p99={stats['p99_ms']:>8.2f} errors={stats['errors']}")
+
+    out = {
+        "meta": {
+            "started_at": fx.tag, "git_rev": _git_rev(), "base": BASE, "rows": counts,
+            "db_mode": pool.get("settings", {}).get("db_mode"),
+            "concurrency": args.concurrency, "duration_s": args.duration, "seed": args.seed,
+        },
+        "endpoints": endpoints,
+    }
+    with open(args.out, "w") as fh:
+        json.dump(out, fh, indent=2, ensure_ascii=False)
+    print(f"Saved {args.out}")
+
+def compare(args):
+    with open(args.before) as fh:
+        a = json.load(fh)
+    with open(args.after) as fh:
+        b = json.load(fh)
+    regressions = 0
+    print(f"{'endpoint':42} {'metric':>8} {'before':>10} {'after':>10} {'change':>8}")
+    for route in sorted(a["endpoints"].keys() & b["endpoints"].keys()):
+        for metric, higher_is_better in (("p50_ms", False), ("p95_ms", False), ("p99_ms", False), ("throughput_rps", True)):
+            old, new = a["endpoints"][route][metric], b["endpoints"][route][metric]
+            change = (new - old) / old * 100 if old else 0.0
+            worse = -change if higher_is_better else change
+            flag = " !" if worse > args.threshold else ""
+            regressions += bool(flag)
+            print(f"{route:42} {metric:>8} {old:>10.2f} {new:>10.2f} {change:>+7.1f}%{flag}")
+    for route in sorted(a["endpoints"].keys() ^ b["endpoints"].keys()):
+        print(f"{route:42} only in {'before' if route in a['endpoints'] else 'after'}")
+    print(f"{regressions} metric(s) worse by more than {args.threshold}%")
+    return 1 if regressions and args.fail else 0
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    g = sub.add_parser("generate", help="rebuild the dataset (truncates cars, mechanics and orders)")
+    add_arguments(g)
+
+    r = sub.add_parser("run", help="benchmark every route and save JSON results")
+    r.add_argument("--concurrency", type=int, default=16)
+    r.add_argument("--duration", type=float, default=10, help="seconds per route")
+    r.add_argument("--seed", type=int, default=42)
+    r.add_argument("--prepare", type=int, default=5000, help="rows created up front for each delete route")
+    r.add_argument("--only", help="regex on 'METHOD /path' to run a subset")
+    r.add_argument("--out", default="bench_results.json")
+
+    c = sub.add_parser("compare", help="diff two result files")
+    c.add_argument("before")
+    c.add_argument("after")
+    c.add_argument("--threshold", type=float, default=10, help="percent change reported as a regression")
+    c.add_argument("--fail", action="store_true", help="exit 1 when any metric regressed")
+
+    args = ap.parse_args()
+    sys.exit({"generate": generate, "run": run, "compare": compare}[args.command](args))
+
+if __name__ == "__main__":
+    main()
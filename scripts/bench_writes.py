@@ -0,0 +1,80 @@
+"""Per-call latency and statement count of the single-row create/update endpoints.
+
+    PYTHONPATH=. python scripts/bench_writes.py --out before.json
+    PYTHONPATH=. python scripts/bench_writes.py --out after.json --compare before.json
+
+Calls run one at a time so the numbers are round trips, not lock or pool waits.
+The statement count comes from the Server-Timing header (SQL_PROFILING=true).
+"""
+import argparse
+import itertools
+import json
+import re
+import statistics
+import requests
+from bench_common import summarize, timed_request
+from bench_suite import Fixture
+
+QUERIES = re.compile(r'desc="(\d+) queries"')
+
+def calls(fx: Fixture):
+    """endpoint -> function(session) returning (method, path, kwargs); created ids feed the updates."""
+    created = {"cars": [], "mechanics": [], "orders": []}
+
+    def create(resource, build):
+        return lambda: ("POST", f"/{resource}", {"json": build()}), created[resource]
+
+    def update(resource, body):
+        ids = itertools.cycle(created[resource])
+        return lambda: ("PUT", f"/{resource}/{next(ids)}", {"json": body()}), None
+
+    return {
+        "POST /cars": create("cars", fx.car),
+        "POST /mechanics": create("mechanics", fx.mechanic),
+        "POST /orders": create("orders", fx.order),
+        "PUT /cars/{id}": update("cars", lambda: {"year": fx.rng.randint(1998, 2024)}),
+        "PUT /mechanics/{id}": update("mechanics", lambda: {"grade": fx.rng.randint(1, 6)}),
+        "PUT /orders/{id}": update("orders", lambda: {"cost": round(fx.rng.uniform(10, 1500), 2), "car_id": fx.car_id()}),
+    }
+
+def _flat(result):
+    return {f"{name}, {k}": v for name, r in result.items() for k, v in r.items() if k in ("p50_ms", "p95_ms", "queries")}
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--calls", type=int, default=300)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--out", default="bench_writes.json")
+    ap.add_argument("--compare", help="earlier result file to diff against")
+    args = ap.parse_args()
+
+    fx = Fixture(args.seed, prepare=0)
+    s = requests.Session()
+    result = {}
+    # creates run first, so every update targets a row this run inserted
+    for name, (build, ids) in calls(fx).items():
+        latencies, queries = [], []
+        for _ in range(args.calls):
+            method, path, kwargs = build()
+            r, ms = timed_request(s, method, path, **kwargs)
+            latencies.append(ms)
+            m = QUERIES.search(r.headers.get("Server-Timing", ""))
+            if m:
+                queries.append(int(m.group(1)))
+            if ids is not None:
+                ids.append(r.json()["id"])
+        result[name] = summarize(latencies) | {"queries": round(statistics.fmean(queries), 2) if queries else None}
+
+    with open(args.out, "w") as fh:
+        json.dump(result, fh, indent=2)
+
+    old = {}
+    if args.compare:
+        with open(args.compare) as fh:
+            old = _flat(json.load(fh))
+    print(f"{'metric':32} {'before':>10} {'after':>10}")
+    for label, value in _flat(result).items():
+        print(f"{label:32} {old.get(label, '-'):>10} {value:>10}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""Deterministic dataset generator: cars, mechanics and orders streamed into Postgres
+with COPY ... FROM STDIN, or written to (and loaded from) CSV snapshots.
+
+    PYTHONPATH=. python scripts/generate_data.py --scale 1m --seed 42
+    PYTHONPATH=. python scripts/generate_data.py --cars 300000 --mechanics 3000 --orders 20000000 --jobs 8
+    PYTHONPATH=. python scripts/generate_data.py --scale 10m --csv-out snapshots/10m
+    PYTHONPATH=. python scripts/generate_data.py --csv-in snapshots/10m
+
+Orders are produced in chunks of CHUNK rows, each from its own Random(seed, chunk),
+so the rows depend only on the seed, the sizes and --anchor/--days, never on --jobs.
+Chunks are built and copied BATCH rows at a time, so memory stays flat at any scale.
+Loading truncates cars, mechanics and orders, drops the secondary indexes of orders
+and disables its user triggers for the load, then rebuilds indexes and the revenue
+rollup and runs VACUUM (ANALYZE).
+"""
+import argparse
+import csv
+import datetime as dt
+import io
+import json
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate
+from pathlib import Path
+import orjson
+import psycopg
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from app.config import settings
+from app.database import engine
+from app.partitions import ensure_partitions
+from app.rollup import backfill
+
+SCALES = {
+    # cars, mechanics, orders
+    "10k": (500, 40, 10_000),
+    "1m": (20_000, 400, 1_000_000),
+    "10m": (200_000, 2_000, 10_000_000),
+}
+CHUNK = 250_000
+BATCH = 5_000
+
+BRANDS = ["Toyota", "BMW", "Mercedes", "Lada", "Kia", "Hyundai", "Ford", "Audi"]
+BRAND_WEIGHTS = list(accumulate([18, 9, 8, 22, 14, 13, 9, 7]))
+WORKS = ["ТО", "Замена масла", "Диагностика", "Тормоза", "Подвеска", "Электрика", "Шиномонтаж"]
+WORK_WEIGHTS = list(accumulate([25, 22, 15, 12, 10, 8, 8]))
+# typical cost and planned duration in days per work type; both are spread log-normally
+WORK_COST = {"ТО": 180, "Замена масла": 60, "Диагностика": 45, "Тормоза": 260, "Подвеска": 420, "Электрика": 210, "Шиномонтаж": 40}
+WORK_DAYS = {"ТО": 1, "Замена масла": 1, "Диагностика": 1, "Тормоза": 2, "Подвеска": 4, "Электрика": 3, "Шиномонтаж": 1}
+SYMPTOMS = ["стук", "вибрация", "не заводится", "тянет в сторону", "шум", "нет тяги"]
+NOTES = ["urgent", "check", "repeat", "noise", "oil"]
+PARTS = ["filter", "pads", "belt", "spark"]
+CHANNELS = ["phone", "web", "walk-in"]
+
+CAR_COLUMNS = ("id", "number", "brand", "year", "owner_name")
+MECHANIC_COLUMNS = ("id", "employee_no", "full_name", "experience_years", "grade")
+ORDER_COLUMNS = (
+    "id", "car_id", "mechanic_id", "cost", "issue_date", "work_type",
+    "planned_end_date", "actual_end_date", "status", "meta",
+)
+
+def _rng(seed: int, table: str, chunk: int = 0) -> random.Random:
+    return random.Random(f"{seed}:{table}:{chunk}")
+
+def cars(seed: int, n: int):
+    rng = _rng(seed, "cars")
+    for i in range(1, n + 1):
+        # most cars in for service are a few years old
+        year = max(1998, 2025 - int(rng.triangular(0, 27, 5)))
+        yield i, f"GN{i:08d}", rng.choices(BRANDS, cum_weights=BRAND_WEIGHTS)[0], year, f"Owner {i}"
+
+def mechanics(seed: int, n: int):
+    rng = _rng(seed, "mechanics")
+    for i in range(1, n + 1):
+        experience = min(40, int(rng.expovariate(1 / 7)))
+        grade = min(6, max(1, 1 + experience // 5 + rng.randint(-1, 1)))
+        yield i, f"GEMP{i:06d}", f"Mechanic {i}", experience, grade
+
+def orders(seed: int, chunk: int, n: int, n_cars: int, n_mechanics: int, anchor: dt.date, days: int):
+    """Rows of one chunk: ids chunk * CHUNK + 1 .. up to n."""
+    rng = _rng(seed, "orders", chunk)
+    for i in range(chunk * CHUNK + 1, min(n, (chunk + 1) * CHUNK) + 1):
+        # fleets bring low-numbered cars back often, senior mechanics get more work
+        car_id = 1 + int(n_cars * rng.random() ** 1.8)
+        mechanic_id = 1 + int(n_mechanics * rng.random() ** 1.4)
+        # the business grows: density rises linearly toward the anchor; Sundays are quiet
+        age = int(days * (1 - math.sqrt(rng.random())))
+        issue = anchor - dt.timedelta(days=age)
+        if issue.weekday() == 6 and rng.random() < 0.7:
+            issue -= dt.timedelta(days=1)
+        work_type = rng.choices(WORKS, cum_weights=WORK_WEIGHTS)[0]
+        cost = min(20000.0, max(10.0, WORK_COST[work_type] * rng.lognormvariate(0, 0.6)))
+        planned = issue + dt.timedelta(days=max(1, round(WORK_DAYS[work_type] * rng.lognormvariate(0, 0.5))))
+        # recent orders are often still open, old ones almost never
+        if rng.random() < (0.6 if age < 30 else 0.03):
+            actual, status = None, rng.choice(("new", "in_progress"))
+        else:
+            actual = max(issue, planned + dt.timedelta(days=round(rng.gauss(0.5, 2))))
+            status = "done" if rng.random() < 0.9 else "new"
+        meta = {
+            "symptoms": rng.choice(SYMPTOMS),
+            "comment": f"client note #{i} {rng.choice(NOTES)}",
+            "parts": [{"name": rng.choice(PARTS), "qty": rng.randint(1, 4)}
+                      for _ in range(rng.choices((0, 1, 2, 3), cum_weights=(25, 70, 90, 100))[0])],
+            "mileage_km": int(rng.lognormvariate(11.5, 0.6)),
+            "channel": rng.choices(CHANNELS, cum_weights=(5, 8, 10))[0],
+        }
+        if rng.random() < 0.1:
+            meta["urgent"] = True
+        yield (i, car_id, mechanic_id, f"{cost:.2f}", issue, work_type, planned, actual, status,
+               orjson.dumps(meta).decode())
+
+def csv_batches(rows):
+    """CSV text in BATCH-row pieces; None becomes an empty field, which COPY reads as NULL."""
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    for n, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if n % BATCH == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+def _connect():
+    return psycopg.connect(make_url(settings.database_url).set(drivername="postgresql").render_as_string(hide_password=False))
+
+def copy_in(conn, table: str, columns, batches) -> None:
+    with conn.cursor().copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN (FORMAT csv)") as copy:
+        for data in batches:
+            copy.write(data)
+
+def _file_batches(path: Path, size: int = 1 << 20):
+    with open(path, encoding="utf-8") as fh:
+        while data := fh.read(size):
+            yield data
+
+def _orders_chunk(args: dict, chunk: int) -> int:
+    """Generate (or read from the snapshot) and COPY one chunk on its own connection."""
+    if args["csv_in"]:
+        batches = _file_batches(Path(args["csv_in"]) / f"orders-{chunk:05d}.csv")
+    else:
+        batches = csv_batches(orders(args["seed"], chunk, args["orders"], args["cars"], args["mechanics"], args["anchor"], args["days"]))
+    with _connect() as conn:
+        copy_in(conn, "orders", ORDER_COLUMNS, batches)
+    return chunk
+
+def _chunks(n_orders: int) -> range:
+    return range(math.ceil(n_orders / CHUNK))
+
+def write_snapshot(args: dict, out: Path):
+    out.mkdir(parents=True, exist_ok=True)
+    sources = {
+        "cars.csv": cars(args["seed"], args["cars"]),
+        "mechanics.csv": mechanics(args["seed"], args["mechanics"]),
+        **{f"orders-{c:05d}.csv": orders(args["seed"], c, args["orders"], args["cars"], args["mechanics"], args["anchor"], args["days"])
+           for c in _chunks(args["orders"])},
+    }
+    for name, rows in sources.items():
+        with open(out / name, "w", encoding="utf-8") as fh:
+            for data in csv_batches(rows):
+                fh.write(data)
+        print(f"wrote {out / name}")
+    manifest = {k: args[k] for k in ("seed", "cars", "mechanics", "orders", "days")} | {"anchor": str(args["anchor"]), "chunk": CHUNK}
+    (out / "manifest.json").write_text(json.dumps(manifest, indent=2))
+
+def _order_indexes(conn) -> list[tuple[str, str]]:
+    """Secondary indexes of orders (not the primary key) with their definitions."""
+    rows = conn.execute(text(
+        "SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid) FROM pg_index i "
+        "LEFT JOIN pg_constraint c ON c.conindid = i.indexrelid "
+        "WHERE i.indrelid = 'orders'::regclass AND c.oid IS NULL ORDER BY 1"
+    )).all()
+    # the definition of a partitioned index reads "ON ONLY orders", which would not build the partitions
+    return [(name, definition.replace(" ON ONLY ", " ON ", 1)) for name, definition in rows]
+
+def load(args: dict, jobs: int = 4, keep_indexes: bool = False):
+    t0 = time.perf_counter()
+    snapshot = Path(args["csv_in"]) if args["csv_in"] else None
+    with engine.begin() as conn:
+        conn.execute(text("TRUNCATE orders, cars, mechanics, mechanic_daily_revenue, order_tombstones RESTART IDENTITY"))
+        ensure_partitions(conn, args["anchor"] - dt.timedelta(days=args["days"]))
+        indexes = [] if keep_indexes else _order_indexes(conn)
+        for name, _ in indexes:
+            conn.execute(text(f"DROP INDEX {name}"))
+        # rollup and change-feed triggers are off during the load; the rollup is rebuilt afterwards
+        conn.execute(text("ALTER TABLE orders DISABLE TRIGGER USER"))
+
+    try:
+        with _connect() as conn:
+            for table, columns, rows in (("cars", CAR_COLUMNS, cars(args["seed"], args["cars"])),
+                                         ("mechanics", MECHANIC_COLUMNS, mechanics(args["seed"], args["mechanics"]))):
+                copy_in(conn, table, columns, _file_batches(snapshot / f"{table}.csv") if snapshot else csv_batches(rows))
+        print(f"cars and mechanics loaded in {time.perf_counter() - t0:.1f}s")
+
+        chunks = _chunks(args["orders"])
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            for done, chunk in enumerate(pool.map(_orders_chunk, [args] * len(chunks), chunks), 1):
+                print(f"orders chunk {chunk} ({done}/{len(chunks)}) after {time.perf_counter() - t0:.1f}s")
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE orders ENABLE TRIGGER USER"))
+            for name, definition in indexes:
+                print(f"creating {name}")
+                conn.execute(text(definition))
+            for table in ("cars", "mechanics", "orders"):
+                conn.execute(text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT coalesce(max(id), 0) + 1 FROM {table}), false)"))
+            backfill(conn)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM (ANALYZE) cars, mechanics, orders, mechanic_daily_revenue"))
+    print(f"Loaded {args['cars']} cars, {args['mechanics']} mechanics, {args['orders']} orders "
+          f"(seed {args['seed']}) in {time.perf_counter() - t0:.1f}s")
+
+def add_arguments(ap: argparse.ArgumentParser):
+    ap.add_argument("--scale", choices=SCALES, default="10k", help="preset sizes; --cars/--mechanics/--orders override")
+    ap.add_argument("--cars", type=int)
+    ap.add_argument("--mechanics", type=int)
+    ap.add_argument("--orders", type=int)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--anchor", type=dt.date.fromisoformat, default=dt.date(2026, 1, 1), help="latest issue_date")
+    ap.add_argument("--days", type=int, default=3 * 365, help="issue_date spread before --anchor")
+    ap.add_argument("--jobs", type=int, default=4, help="parallel COPY connections for orders")
+    ap.add_argument("--keep-indexes", action="store_true", help="load with every index in place (slower)")
+    ap.add_argument("--csv-out", help="write a CSV snapshot to this directory instead of loading")
+    ap.add_argument("--csv-in", help="load a snapshot written with --csv-out")
+
+def resolve(args) -> dict:
+    """Sizes and seed from the preset, the overrides or a snapshot manifest."""
+    n_cars, n_mechanics, n_orders = SCALES[args.scale]
+    params = {
+        "seed": args.seed, "cars": args.cars or n_cars, "mechanics": args.mechanics or n_mechanics,
+        "orders": args.orders or n_orders, "anchor": args.anchor, "days": args.days, "csv_in": args.csv_in,
+    }
+    if args.csv_in:
+        manifest = json.loads((Path(args.csv_in) / "manifest.json").read_text())
+        if manifest["chunk"] != CHUNK:
+            raise SystemExit(f"snapshot was written with CHUNK={manifest['chunk']}, this script uses {CHUNK}")
+        params |= {k: manifest[k] for k in ("seed", "cars", "mechanics", "orders", "days")}
+        params["anchor"] = dt.date.fromisoformat(manifest["anchor"])
+    return params
+
+def generate(args):
+    params = resolve(args)
+    if args.csv_out:
+        write_snapshot(params, Path(args.csv_out))
+    else:
+        load(params, args.jobs, args.keep_indexes)
+        print("Restart the API (or use CACHE_BACKEND=none) so cached responses are dropped")
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(ap)
+    generate(ap.parse_args())
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,9 @@ set -e
 DB_NAME="${DB_NAME:-autoservice}"
 DB_USER="${DB_USER:-autoservice_owner}"
 DB_PASS="${DB_PASS:-autoservice_pass}"
+# read-only role for DATABASE_READ_URL (a second role on the same instance stands in for a replica)
+READER_USER="${READER_USER:-autoservice_reader}"
+READER_PASS="${READER_PASS:-autoservice_reader_pass}"
 
 PGHOST="${PGHOST:-db}"
 PGUSER="${PGUSER:-postgres}"
@@ -13,6 +16,9 @@ BEGIN
   IF NOT EXISTS (SELECT FROM pg_roles WHERE rolname = '${DB_USER}') THEN
     CREATE ROLE ${DB_USER} LOGIN PASSWORD '${DB_PASS}';
   END IF;
+  IF NOT EXISTS (SELECT FROM pg_roles WHERE rolname = '${READER_USER}') THEN
+    CREATE ROLE ${READER_USER} LOGIN PASSWORD '${READER_PASS}';
+  END IF;
 END
 \$\$;
 SQL
@@ -23,3 +29,12 @@ if [ "$DB_EXISTS" != "1" ]; then
 fi
 
 psql -h "$PGHOST" -U "$PGUSER" -d "$DB_NAME" -v ON_ERROR_STOP=1 -c "GRANT ALL PRIVILEGES ON DATABASE ${DB_NAME} TO ${DB_USER};"
+
+psql -h "$PGHOST" -U "$PGUSER" -d "$DB_NAME" -v ON_ERROR_STOP=1 <<SQL
+ALTER ROLE ${READER_USER} SET default_transaction_read_only = on;
+GRANT CONNECT ON DATABASE ${DB_NAME} TO ${READER_USER};
+GRANT USAGE ON SCHEMA public TO ${READER_USER};
+GRANT SELECT ON ALL TABLES IN SCHEMA public TO ${READER_USER};
+-- tables and partitions created later by migrations run as the owner
+ALTER DEFAULT PRIVILEGES FOR ROLE ${DB_USER} IN SCHEMA public GRANT SELECT ON TABLES TO ${READER_USER};
+SQL
@@ -0,0 +1,63 @@
+"""Maintain the monthly partitions of orders.
+
+    PYTHONPATH=. python scripts/manage_partitions.py list
+    PYTHONPATH=. python scripts/manage_partitions.py ensure --ahead 6
+    PYTHONPATH=. python scripts/manage_partitions.py detach --before 2024-01-01            # -> archive.orders_y2023m12, ...
+    PYTHONPATH=. python scripts/manage_partitions.py detach --before 2024-01-01 --drop
+
+The API creates upcoming partitions on startup; run `ensure` from cron for long-lived deployments.
+"""
+import argparse
+import datetime as dt
+import re
+from app.database import engine
+from app.partitions import detach_partition, ensure_partitions, list_partitions
+
+MONTH = re.compile(r"^orders_y(\d{4})m(\d{2})$")
+
+def months_before(conn, before: dt.date):
+    for p in list_partitions(conn):
+        m = MONTH.match(p["name"])
+        if not m:
+            continue
+        year, month = int(m[1]), int(m[2])
+        upper = dt.date(year + month // 12, month % 12 + 1, 1)
+        if upper <= before:
+            yield p["name"]
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="command", required=True)
+    sub.add_parser("list")
+    e = sub.add_parser("ensure", help="create missing monthly partitions")
+    e.add_argument("--from", dest="from_day", type=dt.date.fromisoformat, help="first month to cover (default: this month)")
+    e.add_argument("--ahead", type=int, help="months past the current one (default: ORDERS_PARTITIONS_AHEAD)")
+    d = sub.add_parser("detach", help="detach months that end on or before --before")
+    d.add_argument("--before", type=dt.date.fromisoformat, required=True)
+    d.add_argument("--archive-schema", default="archive")
+    d.add_argument("--drop", action="store_true", help="drop detached partitions instead of archiving them")
+    d.add_argument("--dry-run", action="store_true")
+    args = ap.parse_args()
+
+    if args.command == "list":
+        with engine.connect() as conn:
+            for p in list_partitions(conn):
+                print(f"{p['name']:20} {p['bound']:58} rows~{p['approx_rows']:>10} {p['total_bytes'] / 2**20:>9.1f} MB")
+    elif args.command == "ensure":
+        with engine.begin() as conn:
+            created = ensure_partitions(conn, args.from_day, args.ahead)
+        print(f"Created {created} partition(s)")
+    else:
+        with engine.connect() as conn:
+            names = list(months_before(conn, args.before))
+        for name in names:
+            if args.dry_run:
+                print(f"would detach {name}")
+                continue
+            # one transaction per month keeps the ACCESS EXCLUSIVE lock on orders short
+            with engine.begin() as conn:
+                detach_partition(conn, name, args.archive_schema, args.drop)
+            print(f"{'dropped' if args.drop else 'archived'} {name}")
+
+if __name__ == "__main__":
+    main()
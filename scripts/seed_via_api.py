@@ -7,15 +7,27 @@ BASE = "http://localhost:5400"
 BRANDS = ["Toyota", "BMW", "Mercedes", "Lada", "Kia", "Hyundai", "Ford", "Audi"]
 WORKS = ["ТО", "Замена масла", "Диагностика", "Тормоза", "Подвеска", "Электрика", "Шиномонтаж"]
 
+BATCH = 1000
+
 def post(path, json):
-    r = requests.post(BASE + path, json=json, timeout=10)
+    r = requests.post(BASE + path, json=json, timeout=60)
     r.raise_for_status()
     return r.json()
 
+def post_bulk(path, items):
+    ids = []
+    for start in range(0, len(items), BATCH):
+        res = post(path + "/bulk", items[start:start + BATCH])
+        errors = [it for it in res["items"] if it["error"]]
+        if errors:
+            raise RuntimeError(f"{path}/bulk rejected {len(errors)} items, first: {errors[0]}")
+        ids.extend(it["id"] for it in res["items"])
+    return ids
+
 def main():
     random.seed(42)
 
-    car_ids = []
+    cars = []
     for i in range(200):
         num = f"AA{i:04d}BB"
         car = {
@@ -24,9 +36,10 @@ def main():
             "year": random.randint(1998, 2024),
             "owner_name": f"Owner {i}"
         }
-        car_ids.append(post("/cars", car)["id"])
+        cars.append(car)
+    car_ids = post_bulk("/cars", cars)
 
-    mech_ids = []
+    mechs = []
     for i in range(40):
         mech = {
             "employee_no": f"EMP{i:04d}",
@@ -34,8 +47,10 @@ def main():
             "experience_years": random.randint(0, 25),
             "grade": random.randint(1, 6),
         }
-        mech_ids.append(post("/mechanics", mech)["id"])
+        mechs.append(mech)
+    mech_ids = post_bulk("/mechanics", mechs)
 
+    orders = []
     for i in range(2000):
         issue = dt.date.today() - dt.timedelta(days=random.randint(0, 365))
         planned = issue + dt.timedelta(days=random.randint(1, 14))
@@ -59,7 +74,8 @@ def main():
             "actual_end_date": (str(actual) if actual else None),
             "meta": meta
         }
-        post("/orders", order)
+        orders.append(order)
+    post_bulk("/orders", orders)
 
     print("Seed done")
 